@@ -0,0 +1,264 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import json
+import gzip
+import time
+import random
+import threading
+import collections
+import http.server
+
+class FakeNetcupServer():
+	# Local stand-in for the netcup JSON endpoint that implements just enough
+	# of the DNS API to run NetcupConnection against it. Latency, transient
+	# errors and a request rate limit can be simulated. With compression
+	# enabled, gzip-compressed requests are accepted and responses are
+	# compressed if the client supports it.
+	def __init__(self, zones: dict | None = None, latency: float = 0, error_rate: float = 0, rate_limit: float | None = None, compression: bool = True, seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+		self._zones = zones if (zones is not None) else { }
+		self._latency = latency
+		self._error_rate = error_rate
+		self._rate_limit = rate_limit
+		self._compression = compression
+		self._random = random.Random(seed)
+		self._lock = threading.Lock()
+		self._sessions = set()
+		self._next_id = 1
+		self._rate_window = collections.deque()
+		self.reset_statistics()
+		self._server = http.server.ThreadingHTTPServer((host, port), self._create_handler_class())
+		self._server.daemon_threads = True
+		self._thread = None
+
+	@staticmethod
+	def generate_zones(zone_count: int, records_per_zone: int, serial: int = 2025010101):
+		record_types = [ "A", "AAAA", "TXT", "MX", "CNAME" ]
+		zones = { }
+		for zone_no in range(zone_count):
+			domainname = f"domain{zone_no:06d}.de"
+			records = [ ]
+			for record_no in range(records_per_zone):
+				record_type = record_types[record_no % len(record_types)]
+				destination = {
+					"A":		f"10.{zone_no % 256}.{record_no // 256 % 256}.{record_no % 256}",
+					"AAAA":		f"2001:db8:{zone_no % 65536:x}::{record_no:x}",
+					"TXT":		f"v=spf1 ip4:10.{zone_no % 256}.0.0/16 -all",
+					# Points to the A record generated three records before
+					"MX":		f"host{record_no - 3}.{domainname}",
+					"CNAME":	domainname,
+				}[record_type]
+				records.append({
+					"hostname":		f"host{record_no}",
+					"type":			record_type,
+					"priority":		"10" if (record_type == "MX") else "0",
+					"destination":	destination,
+				})
+			zones[domainname] = {
+				"zone": {
+					"name":				domainname,
+					"ttl":				"86400",
+					"serial":			str(serial),
+					"refresh":			"28800",
+					"retry":			"7200",
+					"expire":			"1209600",
+					"dnssecstatus":		False,
+				},
+				"records": records,
+			}
+		return zones
+
+	@property
+	def uri(self):
+		(host, port) = self._server.server_address[:2]
+		return f"http://{host}:{port}/"
+
+	@property
+	def zones(self):
+		return self._zones
+
+	def reset_statistics(self):
+		with self._lock:
+			self.request_counts = collections.Counter()
+			self.bytes_received = 0
+			self.bytes_sent = 0
+			self.injected_errors = 0
+			self.throttled_requests = 0
+
+	def credentials(self, customer: int = 12345):
+		return {
+			"customer":			customer,
+			"api_password":		"fake-api-password",
+			"api_key":			"fake-api-key",
+			"json_endpoint":	self.uri,
+		}
+
+	def write_credentials_file(self, filename: str, customer: int = 12345):
+		with open(filename, "w") as f:
+			json.dump(self.credentials(customer), f)
+
+	def _allocate_id(self):
+		self._next_id += 1
+		return self._next_id
+
+	def _throttled(self):
+		if self._rate_limit is None:
+			return False
+		now = time.monotonic()
+		with self._lock:
+			while (len(self._rate_window) > 0) and (self._rate_window[0] <= now - 1):
+				self._rate_window.popleft()
+			if len(self._rate_window) >= self._rate_limit:
+				self.throttled_requests += 1
+				return True
+			self._rate_window.append(now)
+		return False
+
+	@staticmethod
+	def _success(responsedata):
+		return { "status": "success", "statuscode": 2000, "shortmessage": "", "longmessage": "", "responsedata": responsedata }
+
+	@staticmethod
+	def _error(statuscode: int, message: str):
+		return { "status": "error", "statuscode": statuscode, "shortmessage": message, "longmessage": message, "responsedata": "" }
+
+	def _serialize_records(self, zone: dict):
+		for record in zone["records"]:
+			if "id" not in record:
+				record["id"] = str(self._allocate_id())
+		return [ dict(record, deleterecord = False, state = "yes") for record in zone["records"] ]
+
+	def _bump_serial(self, zone: dict):
+		zone["zone"]["serial"] = str(int(zone["zone"]["serial"]) + 1)
+
+	def _handle_action(self, action: str, params: dict):
+		if action == "login":
+			session_id = f"fake-session-{self._allocate_id()}"
+			self._sessions.add(session_id)
+			return self._success({ "apisessionid": session_id })
+
+		if params.get("apisessionid") not in self._sessions:
+			return self._error(4001, "The session id is not in a valid format.")
+		if action == "logout":
+			self._sessions.discard(params["apisessionid"])
+			return self._success("")
+
+		zone = self._zones.get(params.get("domainname"))
+		if zone is None:
+			return self._error(5028, "Domain not found.")
+
+		if action == "infoDnsZone":
+			return self._success(dict(zone["zone"]))
+		elif action == "infoDnsRecords":
+			if len(zone["records"]) == 0:
+				return self._error(5029, "Can not get DNS records for zone. The zone does not contain any DNS records.")
+			return self._success({ "dnsrecords": self._serialize_records(zone) })
+		elif action == "updateDnsZone":
+			for (key, value) in params["dnszone"].items():
+				if key != "name":
+					zone["zone"][key] = value if (key == "dnssecstatus") else str(value)
+			self._bump_serial(zone)
+			return self._success(dict(zone["zone"]))
+		elif action == "updateDnsRecords":
+			records_by_id = { record.get("id"): record for record in zone["records"] }
+			for record in params["dnsrecordset"]["dnsrecords"]:
+				record_id = None if (record.get("id") is None) else str(record["id"])
+				if record.get("deleterecord"):
+					records_by_id.pop(record_id, None)
+				elif record_id in records_by_id:
+					records_by_id[record_id].update({ key: str(record[key]) for key in [ "hostname", "type", "destination" ] })
+					records_by_id[record_id]["priority"] = str(record.get("priority", "0"))
+				else:
+					record_id = str(self._allocate_id())
+					records_by_id[record_id] = { "id": record_id, "hostname": record["hostname"], "type": record["type"], "priority": str(record.get("priority", "0")), "destination": record["destination"] }
+			zone["records"] = list(records_by_id.values())
+			self._bump_serial(zone)
+			return self._success({ "dnsrecords": self._serialize_records(zone) })
+		else:
+			return self._error(4013, f"Unknown action '{action}'.")
+
+	def _handle_request(self, request_data: bytes):
+		if self._throttled():
+			return (429, b"Too many requests")
+		if self._latency > 0:
+			time.sleep(self._latency)
+		payload = json.loads(request_data)
+		with self._lock:
+			self.request_counts[payload["action"]] += 1
+			if (self._error_rate > 0) and (self._random.random() < self._error_rate):
+				self.injected_errors += 1
+				return (503, b"Service temporarily unavailable")
+			response = self._handle_action(payload["action"], payload["param"])
+		return (200, json.dumps(response).encode())
+
+	def _create_handler_class(self):
+		server = self
+
+		class RequestHandler(http.server.BaseHTTPRequestHandler):
+			protocol_version = "HTTP/1.1"
+			disable_nagle_algorithm = True
+			wbufsize = 64 * 1024
+
+			def log_message(self, *args):
+				pass
+
+			def do_POST(self):
+				request_data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+				with server._lock:
+					server.bytes_received += len(request_data)
+				content_encoding = self.headers.get("Content-Encoding", "identity")
+				headers = { }
+				if content_encoding == "identity":
+					(status, response_data) = server._handle_request(request_data)
+				elif (content_encoding == "gzip") and server._compression:
+					(status, response_data) = server._handle_request(gzip.decompress(request_data))
+				else:
+					(status, response_data) = (415, f"Unsupported content encoding: {content_encoding}".encode())
+				if (status == 200) and server._compression and ("gzip" in self.headers.get("Accept-Encoding", "")):
+					response_data = gzip.compress(response_data, compresslevel = 6)
+					headers["Content-Encoding"] = "gzip"
+				with server._lock:
+					server.bytes_sent += len(response_data)
+				self.send_response(status)
+				self.send_header("Content-Type", "application/json" if (status == 200) else "text/plain")
+				self.send_header("Content-Length", str(len(response_data)))
+				for (key, value) in headers.items():
+					self.send_header(key, value)
+				self.end_headers()
+				self.wfile.write(response_data)
+
+		return RequestHandler
+
+	def start(self):
+		self._thread = threading.Thread(target = self._server.serve_forever, daemon = True)
+		self._thread.start()
+		return self
+
+	def stop(self):
+		self._server.shutdown()
+		self._server.server_close()
+		self._thread.join()
+
+	def __enter__(self):
+		return self.start()
+
+	def __exit__(self, *args):
+		self.stop()
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import sys
+import time
+import tracemalloc
+import dnssync_nc
+from dnssync_nc.FriendlyArgumentParser import FriendlyArgumentParser
+from FakeNetcupServer import FakeNetcupServer
+
+def measure(name: str, fnc, trace_memory: bool):
+	if trace_memory:
+		tracemalloc.start()
+	t0 = time.perf_counter()
+	result = fnc()
+	duration = time.perf_counter() - t0
+	if trace_memory:
+		(current_memory, peak_memory) = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		print(f"{name:<28s} {duration:8.3f} sec, retained {current_memory / 1024 / 1024:8.1f} MiB, peak {peak_memory / 1024 / 1024:8.1f} MiB")
+	else:
+		print(f"{name:<28s} {duration:8.3f} sec")
+	return result
+
+def main():
+	parser = FriendlyArgumentParser(description = "Benchmark parsing and deserialization of DNS records.")
+	parser.add_argument("-n", "--zones", metavar = "count", type = int, default = 10000, help = "Number of zones. Defaults to %(default)d.")
+	parser.add_argument("-m", "--records", metavar = "count", type = int, default = 100, help = "Number of records per zone. Defaults to %(default)d.")
+	parser.add_argument("--trace-memory", action = "store_true", help = "Measure memory using tracemalloc. Considerably slows down the benchmark.")
+	args = parser.parse_args(sys.argv[1:])
+
+	zones = FakeNetcupServer.generate_zones(args.zones, args.records)
+	server_records = [ dict(record, id = str(record_id), deleterecord = False, state = "yes") for (record_id, record) in enumerate((record for zone in zones.values() for record in zone["records"]), 1) ]
+	layout_text = "".join(f"{domainname}\n" + "".join(f"\t{record['type']}\t{record['hostname']}\t{record['destination']}" + (f"\t{record['priority']}" if record["type"] == "MX" else "") + "\n" for record in zone["records"]) for (domainname, zone) in zones.items())
+	del zones
+	print(f"{args.zones} zones x {args.records} records = {len(server_records)} records")
+
+	result = measure("DNSZoneParser.parse", lambda: dnssync_nc.DNSZoneParser().parse(layout_text), args.trace_memory)
+	del result
+	result = measure("DNSZoneParser.parse -d", lambda: dnssync_nc.DNSZoneParser().parse(layout_text, domainnames = { f"domain{args.zones // 2:06d}.de" }), args.trace_memory)
+	del result
+	result = measure("DNSRecord.deserialize", lambda: [ dnssync_nc.DNSRecord.deserialize(record) for record in server_records ], args.trace_memory)
+	del result
+	if hasattr(dnssync_nc.DNSRecord, "deserialize_many"):
+		result = measure("DNSRecord.deserialize_many", lambda: dnssync_nc.DNSRecord.deserialize_many(server_records), args.trace_memory)
+		del result
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import sys
+import dnssync_nc
+from FakeNetcupServer import FakeNetcupServer
+
+def addresses(server: FakeNetcupServer, domainname: str, hostname: str):
+	return sorted((record["type"], record["destination"]) for record in server.zones[domainname]["records"] if record["hostname"] == hostname)
+
+def main():
+	# Verifies the dynamic DNS update semantics against the fake server
+	domainname = "domain000000.de"
+	failures = 0
+	def check(description: str, condition: bool):
+		nonlocal failures
+		print(f"{'OK  ' if condition else 'FAIL'} {description}")
+		if not condition:
+			failures += 1
+
+	with FakeNetcupServer(zones = FakeNetcupServer.generate_zones(2, 10)) as server:
+		credentials = { key: value for (key, value) in server.credentials().items() if key != "json_endpoint" }
+		with dnssync_nc.NetcupConnection(server.uri, **credentials) as ncc:
+			updates = [ (domainname, "home", "A", "192.0.2.1"), (domainname, "home", "AAAA", "2001:db8::1"), (domainname, "home", "AAAA", "2001:db8::2") ]
+			server.reset_statistics()
+			ncc.update_dynamic_records(updates)
+			check("multiple addresses of a host are set with a single request", server.request_counts["updateDnsRecords"] == 1)
+			check("all addresses of a host are kept", addresses(server, domainname, "home") == [ ("A", "192.0.2.1"), ("AAAA", "2001:db8::1"), ("AAAA", "2001:db8::2") ])
+
+			server.reset_statistics()
+			ncc.update_dynamic_records(updates + [ (domainname, "home", "AAAA", "2001:db8::2") ])
+			check("repeated, unchanged addresses do not cause an update", server.request_counts["updateDnsRecords"] == 0)
+
+			server.reset_statistics()
+			ncc.update_dynamic_records([ (domainname, "home", "AAAA", "2001:db8::3") ])
+			check("a new address replaces all addresses of its type", addresses(server, domainname, "home") == [ ("A", "192.0.2.1"), ("AAAA", "2001:db8::3") ])
+			check("changing an address takes a single request", server.request_counts["updateDnsRecords"] == 1)
+
+	return 0 if (failures == 0) else 1
+
+if __name__ == "__main__":
+	sys.exit(main())
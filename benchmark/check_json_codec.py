@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import sys
+import dnssync_nc
+from dnssync_nc.FriendlyArgumentParser import FriendlyArgumentParser
+from FakeNetcupServer import FakeNetcupServer
+
+def api_payloads(zones: dict):
+	# Mirrors the requests NetcupConnection sends: only strings, ints,
+	# booleans, None, lists and dicts, but never floats.
+	session_params = { "apikey": "ApIkEy", "apisessionid": "sessionid", "customernumber": "12345" }
+	yield { "action": "login", "param": { "customernumber": "12345", "apikey": "ApIkEy", "apipassword": "pässwörd\"\\/" } }
+	for (domainname, zone) in zones.items():
+		dns_zone = dnssync_nc.DNSZone.deserialize(zone["zone"])
+		records = dnssync_nc.DNSRecord.deserialize_many([ dict(record, id = str(record_id)) for (record_id, record) in enumerate(zone["records"], 1) ])
+		yield { "action": "infoDnsZone", "param": dict(session_params, domainname = domainname) }
+		yield { "action": "updateDnsZone", "param": dict(session_params, domainname = domainname, dnszone = dns_zone.serialize()) }
+		yield { "action": "updateDnsRecords", "param": dict(session_params, domainname = domainname, dnsrecordset = { "dnsrecords": [ record.serialize(delete_record = (record_no % 7 == 0)) for (record_no, record) in enumerate(records) ] }) }
+	# Non-ASCII, control and escaped characters as they may appear in TXT
+	# records
+	yield { "action": "updateDnsRecords", "param": dict(session_params, domainname = "xn--mller-kva.de", dnsrecordset = { "dnsrecords": [ dnssync_nc.DNSRecord(dnssync_nc.DNSRecords.RecordType.TXT, "@", text).serialize() for text in [ "Grüße 😀", "tab\there", "quote\" backslash\\ slash/", "  \x7f", "\x00\x1f" ] ] }) }
+
+def main():
+	parser = FriendlyArgumentParser(description = "Verify that all JSON backends encode the API requests of dnssync_nc to identical bytes and decode them identically.")
+	parser.add_argument("-n", "--zones", metavar = "count", type = int, default = 100, help = "Number of zones. Defaults to %(default)d.")
+	parser.add_argument("-m", "--records", metavar = "count", type = int, default = 20, help = "Number of records per zone. Defaults to %(default)d.")
+	args = parser.parse_args(sys.argv[1:])
+
+	backends = dnssync_nc.JSONCodec.available_backends()
+	if len(backends) < 2:
+		print(f"Only the backend(s) {', '.join(backends)} available, nothing to compare. Install orjson.")
+		return 1
+	codecs = [ dnssync_nc.JSONCodec(backend) for backend in backends ]
+
+	mismatches = 0
+	payload_count = 0
+	for payload in api_payloads(FakeNetcupServer.generate_zones(args.zones, args.records)):
+		payload_count += 1
+		encoded = [ codec.encode(payload) for codec in codecs ]
+		if any(data != encoded[0] for data in encoded[1:]):
+			mismatches += 1
+			print(f"Encoding differs for {payload['action']}:")
+			for (codec, data) in zip(codecs, encoded):
+				print(f"    {codec.backend}: {data[:200]}")
+		for codec in codecs:
+			if codec.decode(encoded[0]) != payload:
+				mismatches += 1
+				print(f"Decoding with {codec.backend} differs for {payload['action']}.")
+	print(f"Compared {payload_count} payloads with backends {', '.join(backends)}: {mismatches} mismatch(es)")
+	return 0 if (mismatches == 0) else 1
+
+if __name__ == "__main__":
+	sys.exit(main())
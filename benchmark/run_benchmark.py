@@ -0,0 +1,218 @@
+#!/usr/bin/python3
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import sys
+import json
+import time
+import resource
+import tempfile
+import tracemalloc
+import contextlib
+import dnssync_nc
+import dnssync_nc.__main__
+from dnssync_nc.FriendlyArgumentParser import FriendlyArgumentParser
+from FakeNetcupServer import FakeNetcupServer
+
+class Benchmark():
+	_SCENARIOS = [ "api-pull", "api-push-noop", "api-push-change", "cli-pull", "cli-push" ]
+
+	def __init__(self, args):
+		self._args = args
+		self._tempdir = tempfile.TemporaryDirectory(prefix = "dnssync_nc_benchmark_")
+		self._results = [ ]
+
+	def _tempfile(self, filename: str):
+		return os.path.join(self._tempdir.name, str(len(self._results)), filename)
+
+	@staticmethod
+	@contextlib.contextmanager
+	def _suppress_stdout():
+		# Redirect on file descriptor level so that output which is written
+		# to a previously bound sys.stdout object is suppressed as well
+		sys.stdout.flush()
+		saved_fd = os.dup(sys.stdout.fileno())
+		try:
+			with open(os.devnull, "w") as f:
+				os.dup2(f.fileno(), sys.stdout.fileno())
+				yield
+				sys.stdout.flush()
+		finally:
+			os.dup2(saved_fd, sys.stdout.fileno())
+			os.close(saved_fd)
+
+	def _create_server(self):
+		zones = FakeNetcupServer.generate_zones(self._args.zones, self._args.records)
+		return FakeNetcupServer(zones = zones, latency = self._args.latency / 1000, error_rate = self._args.error_rate, rate_limit = self._args.rate_limit, compression = not self._args.no_server_compression)
+
+	@staticmethod
+	def _layout_text(zones: dict, modify: bool = False):
+		lines = [ ]
+		for (domainname, zone) in zones.items():
+			lines.append(domainname)
+			for (record_no, record) in enumerate(zone["records"]):
+				destination = record["destination"]
+				if modify and (record_no == 0):
+					destination = "127.0.0.1" if (record["type"] == "A") else f"modified.{destination}"
+				if record["type"] == "MX":
+					lines.append(f"	{record['type']}	{record['hostname']}	{destination}	{record['priority']}")
+				else:
+					lines.append(f"	{record['type']}	{record['hostname']}	{destination}")
+			lines.append("")
+		return "\n".join(lines) + "\n"
+
+	def _connection(self, server: FakeNetcupServer):
+		self._scheduler = dnssync_nc.RequestScheduler(rate_limit = self._args.client_rate_limit, burst = self._args.jobs, backoff_base = 0.05)
+		return dnssync_nc.NetcupConnection(server.uri, jobs = self._args.jobs, commit_jobs = self._args.commit_jobs, scheduler = self._scheduler, json_codec = dnssync_nc.JSONCodec(self._args.json_backend), compress_requests = self._args.compress_requests, **{ key: value for (key, value) in server.credentials().items() if key != "json_endpoint" })
+
+	def _run_api_pull(self, server: FakeNetcupServer):
+		with self._connection(server) as ncc:
+			ncc.get_dns_zone_layout(list(server.zones))
+
+	def _run_api_push(self, server: FakeNetcupServer, modify: bool):
+		layout = dnssync_nc.DNSZoneParser().parse(self._layout_text(server.zones, modify = modify))
+		with self._connection(server) as ncc:
+			ncc.push_dns_zone_layout(layout, commit = True)
+
+	def _run_api_push_noop(self, server: FakeNetcupServer):
+		self._run_api_push(server, modify = False)
+
+	def _run_api_push_change(self, server: FakeNetcupServer):
+		self._run_api_push(server, modify = True)
+
+	def _cli_arguments(self, server: FakeNetcupServer):
+		credentials_filename = self._tempfile("credentials.json")
+		server.write_credentials_file(credentials_filename)
+		return [
+			"-c", credentials_filename,
+			"--jobs", str(self._args.jobs),
+			"--commit-jobs", str(self._args.commit_jobs),
+			"--cache-file", self._tempfile("zone_cache.sqlite3"),
+			"--journal-file", self._tempfile("push_journal.sqlite3"),
+			"--template-cache", self._tempfile("templates"),
+			"--json-backend", self._args.json_backend,
+		] + ([ "--compress-requests" ] if self._args.compress_requests else [ ]) + ([ ] if (self._args.client_rate_limit is None) else [ "--rate-limit", str(self._args.client_rate_limit) ])
+
+	def _run_cli_pull(self, server: FakeNetcupServer):
+		with self._suppress_stdout():
+			returncode = dnssync_nc.__main__.main(self._cli_arguments(server) + [ "-a", "pull" ] + list(server.zones))
+		if returncode:
+			raise RuntimeError(f"CLI pull failed with return code {returncode}")
+
+	def _run_cli_push(self, server: FakeNetcupServer):
+		with open(self._tempfile("layout.txt"), "w") as f:
+			f.write(self._layout_text(server.zones, modify = True))
+		# Layout files are looked up relative to the current directory
+		cwd = os.getcwd()
+		os.chdir(self._tempfile(""))
+		try:
+			with self._suppress_stdout():
+				returncode = dnssync_nc.__main__.main(self._cli_arguments(server) + [ "-a", "push", "--commit", "layout.txt" ])
+		finally:
+			os.chdir(cwd)
+		if returncode:
+			raise RuntimeError(f"CLI push failed with return code {returncode}")
+
+	def _run_scenario(self, scenario: str):
+		handler = getattr(self, f"_run_{scenario.replace('-', '_')}")
+		self._scheduler = None
+		os.makedirs(self._tempfile(""))
+		with self._create_server() as server:
+			if self._args.trace_memory:
+				tracemalloc.start()
+			t0 = time.perf_counter()
+			try:
+				handler(server)
+				error = None
+			except Exception as e:
+				error = f"{e.__class__.__name__}: {str(e)}"
+			wall_time = time.perf_counter() - t0
+			if self._args.trace_memory:
+				(_, peak_memory) = tracemalloc.get_traced_memory()
+				tracemalloc.stop()
+			else:
+				peak_memory = None
+
+		return {
+			"scenario":				scenario,
+			"zones":				self._args.zones,
+			"records_per_zone":		self._args.records,
+			"wall_time_secs":		wall_time,
+			"error":				error,
+			"requests":				sum(server.request_counts.values()),
+			"requests_by_action":	dict(sorted(server.request_counts.items())),
+			"bytes_received":		server.bytes_received,
+			"bytes_sent":			server.bytes_sent,
+			"injected_errors":		server.injected_errors,
+			"throttled_requests":	server.throttled_requests,
+			"client_statistics":	None if (self._scheduler is None) else self._scheduler.statistics,
+			"peak_traced_memory":	peak_memory,
+			"max_rss_kib":			resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+		}
+
+	def _print_result(self, result: dict):
+		memory = "" if (result["peak_traced_memory"] is None) else f", peak memory {result['peak_traced_memory'] / 1024 / 1024:.1f} MiB"
+		print(f"{result['scenario']:<16s} {result['wall_time_secs']:8.3f} sec, {result['requests']} requests ({result['bytes_received']} bytes sent to / {result['bytes_sent']} bytes received from server){memory}, max RSS {result['max_rss_kib'] / 1024:.1f} MiB")
+		print(f"{'':<16s} " + ", ".join(f"{action} {count}" for (action, count) in result["requests_by_action"].items()))
+		if (result["injected_errors"] > 0) or (result["throttled_requests"] > 0):
+			print(f"{'':<16s} {result['injected_errors']} injected errors, {result['throttled_requests']} throttled requests")
+		if result["client_statistics"] is not None:
+			print(f"{'':<16s} client: {result['client_statistics']['retries']} retries, {result['client_statistics']['throttled']} locally throttled")
+		if result["error"] is not None:
+			print(f"{'':<16s} FAILED: {result['error']}")
+
+	def run(self):
+		scenarios = self._args.scenario or self._SCENARIOS
+		print(f"Benchmarking {self._args.zones} zones x {self._args.records} records, {self._args.jobs} jobs, {self._args.commit_jobs} commit jobs, {self._args.latency} ms latency, JSON backend {dnssync_nc.JSONCodec(self._args.json_backend).backend}", file = sys.stderr)
+		for scenario in scenarios:
+			for _ in range(self._args.repeat):
+				result = self._run_scenario(scenario)
+				self._print_result(result)
+				self._results.append(result)
+		if self._args.json_output is not None:
+			with open(self._args.json_output, "w") as f:
+				json.dump(self._results, f, indent = 4)
+		self._tempdir.cleanup()
+		return 0 if all(result["error"] is None for result in self._results) else 1
+
+def main():
+	parser = FriendlyArgumentParser(description = "Benchmark dnssync_nc against a local fake netcup JSON endpoint.")
+	parser.add_argument("-n", "--zones", metavar = "count", type = int, default = 100, help = "Number of zones on the fake server. Defaults to %(default)d.")
+	parser.add_argument("-m", "--records", metavar = "count", type = int, default = 20, help = "Number of records per zone. Defaults to %(default)d.")
+	parser.add_argument("-l", "--latency", metavar = "milliseconds", type = float, default = 0, help = "Latency the fake server adds to every request. Defaults to %(default).0f ms.")
+	parser.add_argument("-e", "--error-rate", metavar = "probability", type = float, default = 0, help = "Probability with which the fake server answers a request with HTTP 503. Defaults to %(default).0f.")
+	parser.add_argument("-r", "--rate-limit", metavar = "requests_per_sec", type = float, help = "Number of requests per second after which the fake server answers with HTTP 429. Unlimited by default.")
+	parser.add_argument("-R", "--client-rate-limit", metavar = "requests_per_sec", type = float, help = "Rate limit that the client imposes on itself. Unlimited by default.")
+	parser.add_argument("--no-server-compression", action = "store_true", help = "Make the fake server reject compressed requests and never compress its responses.")
+	parser.add_argument("--json-backend", choices = [ "auto", "orjson", "json" ], default = "auto", help = "JSON implementation the client uses. Defaults to %(default)s.")
+	parser.add_argument("--compress-requests", action = "store_true", help = "Make the client send large requests gzip-compressed.")
+	parser.add_argument("-j", "--jobs", metavar = "count", type = int, default = 4, help = "Number of parallel API requests. Defaults to %(default)d.")
+	parser.add_argument("--commit-jobs", metavar = "count", type = int, default = 2, help = "Number of parallel commits. Defaults to %(default)d.")
+	parser.add_argument("-s", "--scenario", choices = Benchmark._SCENARIOS, action = "append", help = "Scenario to run. Can be given multiple times. By default, all scenarios are run.")
+	parser.add_argument("--repeat", metavar = "count", type = int, default = 1, help = "Run each scenario this many times. Defaults to %(default)d.")
+	parser.add_argument("--trace-memory", action = "store_true", help = "Measure peak Python memory allocation using tracemalloc. Slows down the benchmark considerably.")
+	parser.add_argument("-o", "--json-output", metavar = "filename", help = "Write all results as JSON to this file.")
+	args = parser.parse_args(sys.argv[1:])
+	return Benchmark(args).run()
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,297 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import re
+import sys
+import collections
+from .DNSRecords import DNSRecord, DNSZone, DNSZoneLayout, RecordType
+from .Exceptions import ConfigurationSyntaxError
+
+class _QuotedString(str):
+	pass
+
+class BINDZoneReader():
+	# Reads RFC 1035 master files line by line. Records are converted as
+	# soon as they are complete, so the memory needed does not depend on the
+	# size of the zone file. Per-record TTLs cannot be represented in a
+	# layout and are therefore dropped.
+	_TTL_RE = re.compile(r"(\d+[smhdw]?)+", flags = re.IGNORECASE)
+	_TTL_UNIT_RE = re.compile(r"(\d+)([smhdw]?)", flags = re.IGNORECASE)
+	_TTL_UNITS = { "": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800 }
+	_CLASSES = set([ "IN", "CH", "HS", "CS" ])
+	_NAME_RECORD_TYPES = set([ RecordType.CNAME, RecordType.NS ])
+
+	def __init__(self, origin: str | None = None, ignore_unsupported: bool = False):
+		self._initial_origin = None if (origin is None) else origin.rstrip(".").lower()
+		self._ignore_unsupported = ignore_unsupported
+		self._skipped_records = collections.Counter()
+
+	@property
+	def skipped_records(self):
+		return self._skipped_records
+
+	@classmethod
+	def _parse_ttl(cls, text: str):
+		return sum(int(value) * cls._TTL_UNITS[unit.lower()] for (value, unit) in cls._TTL_UNIT_RE.findall(text))
+
+	@classmethod
+	def _is_ttl(cls, token: str):
+		return (not isinstance(token, _QuotedString)) and (cls._TTL_RE.fullmatch(token) is not None)
+
+	@staticmethod
+	def _tokenize(line: str, lineno: int):
+		if "\"" not in line:
+			# Fast path for the vast majority of lines
+			return line.split(";", 1)[0].replace("(", " ( ").replace(")", " ) ").split()
+		tokens = [ ]
+		i = 0
+		length = len(line)
+		while i < length:
+			char = line[i]
+			if char in " \t\r\n":
+				i += 1
+			elif char == ";":
+				break
+			elif char in "()":
+				tokens.append(char)
+				i += 1
+			elif char == "\"":
+				value = [ ]
+				i += 1
+				while (i < length) and (line[i] != "\""):
+					if (line[i] == "\\") and (i + 1 < length):
+						if line[i + 1 : i + 4].isdigit() and (len(line[i + 1 : i + 4]) == 3):
+							value.append(chr(int(line[i + 1 : i + 4])))
+							i += 4
+						else:
+							value.append(line[i + 1])
+							i += 2
+					else:
+						value.append(line[i])
+						i += 1
+				if i >= length:
+					raise ConfigurationSyntaxError(f"Unterminated quoted string in line {lineno}.")
+				tokens.append(_QuotedString("".join(value)))
+				i += 1
+			else:
+				start = i
+				while (i < length) and (line[i] not in " \t\r\n;()\""):
+					i += 1
+				tokens.append(line[start : i])
+		return tokens
+
+	def _entries(self, lines: "typing.Iterable[str]"):
+		# Yields (lineno, owner_omitted, tokens) for every logical entry, i.e.,
+		# joins lines that are continued within parentheses.
+		tokens = [ ]
+		depth = 0
+		for (lineno, line) in enumerate(lines, 1):
+			if depth == 0:
+				start_lineno = lineno
+				owner_omitted = line[:1] in ( " ", "\t" )
+			for token in self._tokenize(line, lineno):
+				if token == "(":
+					depth += 1
+				elif token == ")":
+					depth -= 1
+					if depth < 0:
+						raise ConfigurationSyntaxError(f"Unbalanced parenthesis in line {lineno}.")
+				else:
+					tokens.append(token)
+			if (depth == 0) and (len(tokens) > 0):
+				yield (start_lineno, owner_omitted, tokens)
+				tokens = [ ]
+		if depth != 0:
+			raise ConfigurationSyntaxError(f"Unbalanced parenthesis in entry starting in line {start_lineno}.")
+
+	def _absolute_name(self, name: str, lineno: int):
+		if name.endswith("."):
+			return name[:-1].lower()
+		if self._origin is None:
+			raise ConfigurationSyntaxError(f"Relative name '{name}' in line {lineno}, but no $ORIGIN is known.")
+		if name == "@":
+			return self._origin
+		return f"{name.lower()}.{self._origin}"
+
+	def _hostname(self, name: str, zone: DNSZone, lineno: int):
+		if name == zone.domainname:
+			return "@"
+		elif name.endswith("." + zone.domainname):
+			return name[: -len(zone.domainname) - 1]
+		else:
+			raise ConfigurationSyntaxError(f"Name {name} in line {lineno} is not part of zone {zone.domainname}.")
+
+	def _record(self, record_type: RecordType, hostname: str, rdata: list[str], lineno: int):
+		match record_type:
+			case RecordType.A | RecordType.AAAA:
+				(destination, ) = rdata
+				return DNSRecord(record_type = record_type, hostname = sys.intern(hostname), destination = destination)
+
+			case RecordType.CNAME | RecordType.NS:
+				(destination, ) = rdata
+				return DNSRecord(record_type = record_type, hostname = sys.intern(hostname), destination = sys.intern(self._absolute_name(destination, lineno)))
+
+			case RecordType.MX:
+				(priority, destination) = rdata
+				return DNSRecord(record_type = record_type, hostname = sys.intern(hostname), destination = sys.intern(self._absolute_name(destination, lineno)), priority = int(priority))
+
+			case RecordType.TXT:
+				return DNSRecord(record_type = record_type, hostname = sys.intern(hostname), destination = "".join(rdata))
+
+			case RecordType.CAA:
+				(flags, tag, value) = rdata
+				return DNSRecord(record_type = record_type, hostname = sys.intern(hostname), destination = f"{int(flags)} {tag} \"{value}\"")
+
+	def read(self, lines: "typing.Iterable[str]"):
+		# Yields a DNSZone (without entries) whenever a zone starts, followed
+		# by the DNSRecords of that zone. A zone starts with its SOA record
+		# or, if there is none, with the first record in the initial origin.
+		self._origin = self._initial_origin
+		default_ttl = None
+		last_owner = None
+		zone = None
+		zone_yielded = False
+
+		for (lineno, owner_omitted, tokens) in self._entries(lines):
+			if tokens[0].startswith("$"):
+				match (tokens[0].upper(), len(tokens)):
+					case ("$ORIGIN", 2):
+						self._origin = self._absolute_name(tokens[1], lineno)
+					case ("$TTL", 2) if self._is_ttl(tokens[1]):
+						default_ttl = self._parse_ttl(tokens[1])
+					case _:
+						raise ConfigurationSyntaxError(f"Unsupported or malformed directive {tokens[0]} in line {lineno}.")
+				continue
+
+			if not owner_omitted:
+				last_owner = self._absolute_name(tokens.pop(0), lineno)
+			elif last_owner is None:
+				raise ConfigurationSyntaxError(f"Record in line {lineno} has no owner name and there is no previous one.")
+			while (len(tokens) > 0) and (self._is_ttl(tokens[0]) or (tokens[0].upper() in self._CLASSES)):
+				if (tokens[0].upper() in self._CLASSES) and (tokens[0].upper() != "IN"):
+					raise ConfigurationSyntaxError(f"Only records of class IN are supported, but line {lineno} uses class {tokens[0]}.")
+				tokens.pop(0)
+			if len(tokens) == 0:
+				raise ConfigurationSyntaxError(f"Record in line {lineno} has no record type.")
+			(type_name, rdata) = (tokens[0].upper(), tokens[1:])
+
+			if type_name == "SOA":
+				if len(rdata) != 7:
+					raise ConfigurationSyntaxError(f"SOA record in line {lineno} needs 7 fields, but has {len(rdata)}.")
+				if (zone is not None) and (not zone_yielded):
+					yield zone
+				(refresh, retry, expire, minimum) = (self._parse_ttl(value) for value in rdata[3:])
+				zone = DNSZone(domainname = last_owner, ttl = minimum if (default_ttl is None) else default_ttl, refresh = refresh, retry = retry, expire = expire)
+				zone_yielded = False
+				continue
+
+			record_type = RecordType._BY_VALUE.get(type_name)
+			if record_type is None:
+				if not self._ignore_unsupported:
+					raise ConfigurationSyntaxError(f"Unsupported record type {type_name} in line {lineno}.")
+				self._skipped_records[type_name] += 1
+				continue
+
+			if zone is None:
+				if self._origin is None:
+					raise ConfigurationSyntaxError(f"Record in line {lineno} precedes any SOA record or $ORIGIN, unable to determine its zone.")
+				zone = DNSZone(domainname = self._origin)
+				if default_ttl is not None:
+					zone.ttl = default_ttl
+			if not zone_yielded:
+				yield zone
+				zone_yielded = True
+
+			try:
+				yield self._record(record_type, self._hostname(last_owner, zone, lineno), rdata, lineno)
+			except ValueError as e:
+				raise ConfigurationSyntaxError(f"Unable to parse {type_name} record in line {lineno}: {str(e)}") from e
+
+		if (zone is not None) and (not zone_yielded):
+			yield zone
+
+	def read_file(self, filename: str):
+		with open(filename) as f:
+			yield from self.read(f)
+
+	def read_layout(self, lines: "typing.Iterable[str]"):
+		layout = collections.OrderedDict()
+		for item in self.read(lines):
+			if isinstance(item, DNSZone):
+				zone = layout.setdefault(item.domainname, item)
+			else:
+				zone.entries.append(item)
+		return DNSZoneLayout(layout)
+
+
+class BINDZoneWriter():
+	# Writes zones as RFC 1035 master files. The SOA record is synthesized
+	# from the zone settings, with netcup's primary name server as default.
+	_TXT_CHUNK_SIZE = 255
+
+	def __init__(self, f: "io.TextIOWrapper", primary_nameserver: str = "root-dns.netcup.net", hostmaster: str | None = None):
+		self._f = f
+		self._primary_nameserver = primary_nameserver.rstrip(".")
+		self._hostmaster = hostmaster
+		self._zone_count = 0
+
+	@staticmethod
+	def _name(name: str):
+		if (name == "@") or name.endswith(".") or ("." not in name):
+			return name
+		return f"{name}."
+
+	@classmethod
+	def _quote(cls, text: str):
+		text = text.replace("\\", "\\\\").replace("\"", "\\\"")
+		return " ".join(f"\"{text[i : i + cls._TXT_CHUNK_SIZE]}\"" for i in range(0, max(len(text), 1), cls._TXT_CHUNK_SIZE))
+
+	def begin_zone(self, zone: DNSZone):
+		hostmaster = self._hostmaster or f"hostmaster.{zone.domainname}"
+		if self._zone_count > 0:
+			print(file = self._f)
+		self._zone_count += 1
+		print(f"$ORIGIN {zone.domainname}.", file = self._f)
+		print(f"$TTL {zone.ttl}", file = self._f)
+		if zone.dnssec:
+			print("; DNSSEC enabled", file = self._f)
+		print(f"@	IN	SOA	{self._primary_nameserver}. {hostmaster.rstrip('.')}. ( {zone.serial or 1} {zone.refresh} {zone.retry} {zone.expire} {zone.ttl} )", file = self._f)
+
+	def write_record(self, record: DNSRecord):
+		match record.record_type:
+			case RecordType.CNAME | RecordType.NS:
+				rdata = self._name(record.destination)
+			case RecordType.MX:
+				rdata = f"{record.priority} {self._name(record.destination)}"
+			case RecordType.TXT:
+				rdata = self._quote(record.destination)
+			case _:
+				rdata = record.destination
+		print(f"{record.hostname}	IN	{record.record_type.value}	{rdata}", file = self._f)
+
+	def write_zone(self, zone: DNSZone, sort_records: bool = False):
+		self.begin_zone(zone)
+		for record in (sorted(zone.entries) if sort_records else zone.entries):
+			self.write_record(record)
+
+	def write_layout(self, layout: DNSZoneLayout, sort_records: bool = False):
+		for domainname in layout.domainnames:
+			self.write_zone(layout[domainname], sort_records = sort_records)
@@ -0,0 +1,58 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import json
+from .DNSZoneDiff import DNSZoneDiff
+from .Exceptions import ConfigurationSyntaxError
+
+class ChangePlan():
+	_FORMAT_VERSION = 1
+
+	def __init__(self, diffs: list[DNSZoneDiff]):
+		self._diffs = diffs
+
+	@property
+	def diffs(self):
+		return self._diffs
+
+	def serialize(self):
+		return {
+			"version":	self._FORMAT_VERSION,
+			"zones":	[ diff.serialize() for diff in self._diffs ],
+		}
+
+	@classmethod
+	def deserialize(cls, data: dict):
+		if data.get("version") != cls._FORMAT_VERSION:
+			raise ConfigurationSyntaxError(f"Unsupported change plan version {data.get('version')}, expected {cls._FORMAT_VERSION}.")
+		return cls([ DNSZoneDiff.deserialize(zone_data) for zone_data in data["zones"] ])
+
+	def write(self, filename: str):
+		with open(filename, "w") as f:
+			json.dump(self.serialize(), f, separators = (",", ":"))
+
+	@classmethod
+	def read(cls, filename: str):
+		with open(filename) as f:
+			return cls.deserialize(json.load(f))
+
+	def __len__(self):
+		return len(self._diffs)
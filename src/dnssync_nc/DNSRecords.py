@@ -19,6 +19,7 @@
 #
 #	Johannes Bauer <JohannesBauer@gmx.de>
 
+import io
 import re
 import sys
 import enum
@@ -26,6 +27,7 @@ import collections
 import dataclasses
 import ipaddress
 import functools
+import hashlib
 from .Exceptions import ConfigurationSyntaxError
 
 @functools.total_ordering
@@ -42,6 +44,7 @@ class RecordType(enum.Enum):
 		return self._ORDER[self] < self._ORDER[other]
 
 RecordType._ORDER = { value: index for (index, value) in enumerate(RecordType) }
+RecordType._BY_VALUE = { value.value: value for value in RecordType }
 
 
 @dataclasses.dataclass(order = True, frozen = True, slots = True)
@@ -52,11 +55,37 @@ class DNSRecord():
 	priority: int | None = None	# Only used for MX
 	record_id: int | None = dataclasses.field(repr = None, default = None, compare = False)
 
+	@staticmethod
+	@functools.lru_cache(maxsize = 65536)
+	def _ip_address_version(address: str):
+		return ipaddress.ip_address(address).version
+
 	@classmethod
 	def deserialize(cls, data: dict):
 		record_type = RecordType(data["type"])
 		priority = int(data["priority"]) if (record_type == RecordType.MX) else None
-		return cls(record_type = record_type, hostname = data["hostname"], destination = data["destination"], priority = priority, record_id = int(data["id"]))
+		record_id = int(data["id"]) if (data.get("id") is not None) else None
+		return cls(record_type = record_type, hostname = sys.intern(data["hostname"]), destination = sys.intern(data["destination"]), priority = priority, record_id = record_id)
+
+	@classmethod
+	def deserialize_many(cls, records: list[dict]):
+		# Bulk variant of deserialize(). Hostnames and destinations are
+		# interned since most of them repeat many times across zones.
+		intern = sys.intern
+		record_type_by_value = RecordType._BY_VALUE
+		mx = RecordType.MX
+		result = [ ]
+		for data in records:
+			record_type = record_type_by_value.get(data["type"])
+			if record_type is None:
+				# Raises the appropriate ValueError
+				record_type = RecordType(data["type"])
+			priority = int(data["priority"]) if (record_type is mx) else None
+			record_id = data.get("id")
+			if record_id is not None:
+				record_id = int(record_id)
+			result.append(cls(record_type, intern(data["hostname"]), intern(data["destination"]), priority, record_id))
+		return result
 
 	def serialize(self, delete_record: bool = False):
 		serialized = {
@@ -72,13 +101,13 @@ class DNSRecord():
 		return serialized
 
 	def __post_init__(self):
-		if (self.priority is not None) and (self.record_type != RecordType.MX):
+		if (self.priority is not None) and (self.record_type is not RecordType.MX):
 			raise ValueError(f"Priority only makes sense for MX records, this is a {self.record_type} record.")
-		if self.record_type == RecordType.A:
-			if ipaddress.ip_address(self.destination).version != 4:
+		if self.record_type is RecordType.A:
+			if self._ip_address_version(self.destination) != 4:
 				raise ValueError(f"A record requires an IPv4 address, but got: {self.destination}")
-		if self.record_type == RecordType.AAAA:
-			if ipaddress.ip_address(self.destination).version != 6:
+		elif self.record_type is RecordType.AAAA:
+			if self._ip_address_version(self.destination) != 6:
 				raise ValueError(f"AAAA record requires an IPv6 address, but got: {self.destination}")
 
 	def __format__(self, fmt_str: str):
@@ -121,28 +150,36 @@ class DNSZone():
 			"dnssecstatus":		self.dnssec,
 		}
 
-	def print(self, f: "io.TextIOWrapper" = sys.stdout, sort_records: bool = False):
+	def content_hash(self):
+		# Identifies zone settings and records independent of record order
+		content = "\n".join([ str(self) ] + [ format(record) for record in sorted(self.entries) ])
+		return hashlib.sha256(content.encode()).hexdigest()
+
+	def print_header(self, f: "io.TextIOWrapper | None" = None):
 		default = DNSZone("")
 		if self.serial is not None:
-			print(f"# {self.domainname} serial {self.serial}")
-		print(f"{self.domainname}")
+			print(f"# {self.domainname} serial {self.serial}", file = f)
+		print(f"{self.domainname}", file = f)
 		if self.ttl != default.ttl:
-			print(f"	.ttl	{self.ttl}")
+			print(f"	.ttl	{self.ttl}", file = f)
 		if self.refresh != default.refresh:
-			print(f"	.refresh	{self.refresh}")
+			print(f"	.refresh	{self.refresh}", file = f)
 		if self.retry != default.retry:
-			print(f"	.retry	{self.retry}")
+			print(f"	.retry	{self.retry}", file = f)
 		if self.expire != default.expire:
-			print(f"	.expire	{self.expire}")
+			print(f"	.expire	{self.expire}", file = f)
 		if self.dnssec != default.dnssec:
-			print(f"	.dnssec	{self.dnssec}")
+			print(f"	.dnssec	{self.dnssec}", file = f)
+
+	def print(self, f: "io.TextIOWrapper | None" = None, sort_records: bool = False):
+		self.print_header(f = f)
 		seen = set()
 		iterator = sorted(self.entries) if sort_records else self.entries
 		for record in iterator:
 			if record in seen:
 				continue
 			seen.add(record)
-			print(f"	{record}")
+			print(f"	{record}", file = f)
 
 	@staticmethod
 	def _tobool(str_bool: str):
@@ -171,7 +208,7 @@ class DNSZoneLayout():
 	def domainnames(self):
 		return iter(self._layout)
 
-	def print(self, f: "io.TextIOWrapper" = sys.stdout, sort_records: bool = False):
+	def print(self, f: "io.TextIOWrapper | None" = None, sort_records: bool = False):
 		for dns_zone in self._layout.values():
 			dns_zone.print(f = f, sort_records = sort_records)
 			print(file = f)
@@ -184,6 +221,19 @@ class DNSZoneLayout():
 				filtered_layout[domainname] = self._layout[domainname]
 		return DNSZoneLayout(filtered_layout)
 
+	def serialize_compact(self):
+		# Plain tuples, e.g., to transfer a layout between processes
+		return [ (zone.domainname, zone.ttl, zone.refresh, zone.retry, zone.expire, zone.dnssec, [ (record.record_type.value, record.hostname, record.destination, record.priority) for record in zone.entries ]) for zone in self._layout.values() ]
+
+	@classmethod
+	def deserialize_compact(cls, data: list[tuple]):
+		record_type_by_value = RecordType._BY_VALUE
+		layout = collections.OrderedDict()
+		for (domainname, ttl, refresh, retry, expire, dnssec, records) in data:
+			entries = [ DNSRecord(record_type_by_value[record_type], sys.intern(hostname), sys.intern(destination), priority) for (record_type, hostname, destination, priority) in records ]
+			layout[domainname] = DNSZone(domainname = domainname, ttl = ttl, refresh = refresh, retry = retry, expire = expire, dnssec = dnssec, entries = entries)
+		return cls(layout)
+
 	def __getitem__(self, domainname: str):
 		return self._layout[domainname]
 
@@ -198,13 +248,28 @@ class DNSZoneParser():
 	def __init__(self):
 		pass
 
-	def parse(self, dns_zone_text: str):
-		layout = collections.OrderedDict()
+	def parse_stream(self, lines: "typing.Iterable[str]", unique_zones: bool = False, domainnames: "typing.Container[str] | None" = None):
+		# Yields every DNSZone as soon as its section is complete, i.e., when
+		# the next domain starts or the input ends. Since a domain may appear
+		# multiple times, the same DNSZone object is yielded again (with the
+		# additional entries) whenever one of its later sections completes;
+		# to support this, all zones need to be kept. If unique_zones is set,
+		# repeating a domain is an error instead and only the zone currently
+		# being parsed is held in memory. If domainnames is given, only those
+		# zones are materialized: the sections of all other zones are
+		# recognized by their first character only and skipped without being
+		# parsed (and therefore also without being checked for errors).
+		zones = { }
 		default_zone = DNSZone("")
 		default_zone_values = default_zone.zone_values
 		current_zone = None
+		skipped_domainname = None
 
-		for (lineno, line) in enumerate(dns_zone_text.split("\n"), 1):
+		for (lineno, line) in enumerate(lines, 1):
+			if (skipped_domainname is not None) and (line[:1] in ( "\t", "\n", "#", "" )):
+				continue
+			if line.endswith("\n"):
+				line = line[:-1]
 			if line.lstrip().startswith("#"):
 				continue
 			if (rematch := self._LAYOUT_LINE_RE.fullmatch(line)) is None:
@@ -217,14 +282,32 @@ class DNSZoneParser():
 				content = self._CONTENT_RE.split(rematch["content"])
 
 			match (indent, content):
+				case (0, (domainname, )) if (domainnames is not None) and (domainname not in domainnames):
+					if current_zone is not None:
+						yield current_zone
+						current_zone = None
+					if unique_zones and (domainname in zones) and (domainname != skipped_domainname):
+						raise ConfigurationSyntaxError(f"Zone {domainname} defined again in line {lineno}, but every zone may only appear once.")
+					zones[domainname] = None
+					skipped_domainname = domainname
+
 				case (0, (domainname, )):
-					if domainname in layout:
-						# Append to defined zone
-						current_zone = layout[domainname]
+					skipped_domainname = None
+					if (current_zone is not None) and (current_zone.domainname == domainname):
+						# Continue current zone
+						pass
 					else:
-						# New zone
-						current_zone = DNSZone(domainname = domainname, **default_zone.zone_values)
-						layout[current_zone.domainname] = current_zone
+						if current_zone is not None:
+							yield current_zone
+						if domainname in zones:
+							if unique_zones:
+								raise ConfigurationSyntaxError(f"Zone {domainname} defined again in line {lineno}, but every zone may only appear once.")
+							# Append to defined zone
+							current_zone = zones[domainname]
+						else:
+							# New zone
+							current_zone = DNSZone(domainname = domainname, **default_zone.zone_values)
+							zones[domainname] = None if unique_zones else current_zone
 
 				case (0, (setting, value)) if setting.startswith("."):
 					setting = setting[1:]
@@ -240,7 +323,7 @@ class DNSZoneParser():
 					except ValueError as e:
 						raise ConfigurationSyntaxError(f"Unknown record type {record_type} in line {lineno}.") from e
 					try:
-						current_zone.entries.append(DNSRecord(record_type = record_type, hostname = hostname, destination = destination))
+						current_zone.entries.append(DNSRecord(record_type = record_type, hostname = sys.intern(hostname), destination = sys.intern(destination)))
 					except ValueError as e:
 						raise ConfigurationSyntaxError(f"Unable to parse DNS record in line {lineno}: {str(e)}") from e
 
@@ -253,7 +336,7 @@ class DNSZoneParser():
 					except ValueError as e:
 						raise ConfigurationSyntaxError(f"Unknown record type {record_type} in line {lineno}.") from e
 					try:
-						current_zone.entries.append(DNSRecord(record_type = record_type, hostname = hostname, destination = destination, priority = int(priority)))
+						current_zone.entries.append(DNSRecord(record_type = record_type, hostname = sys.intern(hostname), destination = sys.intern(destination), priority = int(priority)))
 					except ValueError as e:
 						raise ConfigurationSyntaxError(f"Unable to parse DNS record in line {lineno}: {str(e)}") from e
 
@@ -272,4 +355,15 @@ class DNSZoneParser():
 				case _:
 					raise SyntaxError(f"Unable to parse content line {lineno}, indent {indent}: \"{content}\"")
 
+		if current_zone is not None:
+			yield current_zone
+
+	def parse_file(self, filename: str, unique_zones: bool = False, domainnames: "typing.Container[str] | None" = None):
+		with open(filename, newline = "\n") as f:
+			yield from self.parse_stream(f, unique_zones = unique_zones, domainnames = domainnames)
+
+	def parse(self, dns_zone_text: str, domainnames: "typing.Container[str] | None" = None):
+		layout = collections.OrderedDict()
+		for dns_zone in self.parse_stream(io.StringIO(dns_zone_text, newline = "\n"), domainnames = domainnames):
+			layout[dns_zone.domainname] = dns_zone
 		return DNSZoneLayout(layout)
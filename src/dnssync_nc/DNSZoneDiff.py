@@ -0,0 +1,176 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import collections
+import dataclasses
+from .DNSRecords import DNSZone, DNSRecord
+
+@dataclasses.dataclass(slots = True)
+class DNSZoneDiff():
+	current_zone: DNSZone
+	new_zone: DNSZone
+	removed_records: list[DNSRecord] = dataclasses.field(default_factory = list)
+	added_records: list[DNSRecord] = dataclasses.field(default_factory = list)
+	updated_records: list[tuple[DNSRecord, DNSRecord]] = dataclasses.field(default_factory = list)
+
+	# A deserialized diff only knows about the records that change, not about
+	# the complete current or new record set; the content hash of the new
+	# zone is therefore carried along.
+	current_records_known: bool = True
+	new_content_hash: str | None = None
+
+	@classmethod
+	def compute(cls, current_zone: DNSZone, new_zone: DNSZone):
+		# DNS records form a set, so a record given twice in the new zone is
+		# only added once. The server side is counted as a multiset instead:
+		# identical records on the server (which differ only in their record
+		# ID) are all accounted for, so that surplus copies are removed.
+		current_records = collections.defaultdict(list)
+		for record in current_zone.entries:
+			current_records[record].append(record)
+
+		added_records = [ ]
+		for new_record in dict.fromkeys(new_zone.entries):
+			if len(current_records.get(new_record, ( ))) > 0:
+				# Already present, no change necessary
+				current_records[new_record].pop()
+			else:
+				added_records.append(new_record)
+		removed_records = sorted(record for records in current_records.values() for record in records)
+
+		# A removal and an addition of the same type and hostname are turned
+		# into an in-place update of the existing record
+		removed_by_key = collections.defaultdict(collections.deque)
+		for record in removed_records:
+			if record.record_id is not None:
+				removed_by_key[(record.record_type, record.hostname)].append(record)
+		updated_records = [ ]
+		remaining_added_records = [ ]
+		for new_record in added_records:
+			candidates = removed_by_key.get((new_record.record_type, new_record.hostname))
+			if candidates:
+				old_record = candidates.popleft()
+				updated_records.append((old_record, dataclasses.replace(new_record, record_id = old_record.record_id)))
+			else:
+				remaining_added_records.append(new_record)
+		remaining_removed_records = [ record for records in removed_by_key.values() for record in records ]
+		remaining_removed_records += [ record for record in removed_records if record.record_id is None ]
+		remaining_removed_records.sort()
+
+		return cls(current_zone = current_zone, new_zone = new_zone, removed_records = remaining_removed_records, added_records = remaining_added_records, updated_records = updated_records)
+
+	@property
+	def domainname(self):
+		return self.current_zone.domainname
+
+	@property
+	def zone_changed(self):
+		return self.current_zone != self.new_zone
+
+	@property
+	def records_changed(self):
+		return (len(self.removed_records) > 0) or (len(self.added_records) > 0) or (len(self.updated_records) > 0)
+
+	@property
+	def changed(self):
+		return self.zone_changed or self.records_changed
+
+	def content_hash(self):
+		if self.new_content_hash is not None:
+			return self.new_content_hash
+		return self.new_zone.content_hash()
+
+	def serialize(self):
+		return {
+			"domainname":		self.domainname,
+			"serial":			self.current_zone.serial,
+			"current_zone":		self.current_zone.serialize(),
+			"new_zone":			self.new_zone.serialize(),
+			"content_hash":		self.content_hash(),
+			"removed":			[ record.serialize(delete_record = True) for record in self.removed_records ],
+			"updated":			[ (old_record.serialize(), new_record.serialize()) for (old_record, new_record) in self.updated_records ],
+			"added":			[ record.serialize() for record in self.added_records ],
+		}
+
+	@staticmethod
+	def _deserialize_zone(data: dict, serial: int | None = None):
+		return DNSZone(domainname = data["name"], ttl = int(data["ttl"]), refresh = int(data["refresh"]), retry = int(data["retry"]), expire = int(data["expire"]), dnssec = data["dnssecstatus"], serial = serial)
+
+	@classmethod
+	def deserialize(cls, data: dict):
+		return cls(
+			current_zone = cls._deserialize_zone(data["current_zone"], serial = data["serial"]),
+			new_zone = cls._deserialize_zone(data["new_zone"]),
+			removed_records = [ DNSRecord.deserialize(record_dict) for record_dict in data["removed"] ],
+			updated_records = [ (DNSRecord.deserialize(old_record_dict), DNSRecord.deserialize(new_record_dict)) for (old_record_dict, new_record_dict) in data["updated"] ],
+			added_records = [ DNSRecord.deserialize(record_dict) for record_dict in data["added"] ],
+			current_records_known = False,
+			new_content_hash = data["content_hash"],
+		)
+
+	def _record_operations(self):
+		# Yields (hostname, operation order, serialized record) tuples;
+		# deletions come first, then updates, then additions.
+		for record in self.removed_records:
+			yield (record.hostname, 0, record.serialize(delete_record = True))
+		for (old_record, new_record) in self.updated_records:
+			yield (new_record.hostname, 1, new_record.serialize())
+		for record in self.added_records:
+			yield (record.hostname, 2, record.serialize())
+
+	def serialize_records(self):
+		return [ serialized_record for (hostname, order, serialized_record) in self._record_operations() ]
+
+	def serialize_record_chunks(self, chunk_size: int | None = None):
+		# Splits the record set into chunks of at most chunk_size records.
+		# All changes of one hostname always end up in the same chunk (which
+		# may then exceed chunk_size), so that, e.g., replacing an A record
+		# by a CNAME is never split across requests. Within each chunk,
+		# operations are ordered just like in the unchunked record set.
+		if chunk_size is None:
+			return [ self.serialize_records() ] if self.records_changed else [ ]
+
+		changes_by_hostname = collections.OrderedDict()
+		for (hostname, order, serialized_record) in self._record_operations():
+			changes_by_hostname.setdefault(hostname, [ ]).append((order, serialized_record))
+
+		chunks = [ ]
+		chunk = [ ]
+		for hostname_changes in changes_by_hostname.values():
+			if (len(chunk) > 0) and (len(chunk) + len(hostname_changes) > chunk_size):
+				chunks.append(chunk)
+				chunk = [ ]
+			chunk += hostname_changes
+		if len(chunk) > 0:
+			chunks.append(chunk)
+		return [ [ serialized_record for (order, serialized_record) in sorted(chunk, key = lambda change: change[0]) ] for chunk in chunks ]
+
+	def print(self, f: "io.TextIOWrapper | None" = None):
+		if self.zone_changed:
+			print(f"-{self.current_zone}", file = f)
+			print(f"+{self.new_zone}", file = f)
+		for (old_record, new_record) in self.updated_records:
+			print(f"-{self.domainname} {old_record}", file = f)
+			print(f"+{self.domainname} {new_record}", file = f)
+		for record in self.removed_records:
+			print(f"-{self.domainname} {record}", file = f)
+		for record in self.added_records:
+			print(f"+{self.domainname} {record}", file = f)
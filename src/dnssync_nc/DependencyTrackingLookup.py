@@ -0,0 +1,48 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import contextlib
+import mako.lookup
+
+class DependencyTrackingLookup(mako.lookup.TemplateLookup):
+	# Records the files of all templates that are retrieved while rendering,
+	# i.e., the layout file itself and everything it includes or inherits.
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._recorders = [ ]
+
+	@contextlib.contextmanager
+	def record_dependencies(self):
+		dependencies = set()
+		self._recorders.append(dependencies)
+		try:
+			yield dependencies
+		finally:
+			self._recorders.remove(dependencies)
+
+	def get_template(self, uri: str):
+		template = super().get_template(uri)
+		if template.filename is not None:
+			filename = os.path.realpath(template.filename)
+			for dependencies in self._recorders:
+				dependencies.add(filename)
+		return template
@@ -19,41 +19,106 @@
 #
 #	Johannes Bauer <JohannesBauer@gmx.de>
 
-import subprocess
+import re
 import base64
+import functools
 from .Exceptions import ConfigurationSyntaxError
 
 class EntryHelper():
+	_PEM_RE = re.compile(r"-----BEGIN (?P<label>[A-Z ]+)-----(?P<data>[A-Za-z0-9+/=\s]*)-----END (?P=label)-----")
+	_OID_RSA_ENCRYPTION = bytes.fromhex("2a864886f70d010101")
+	_OID_ED25519 = bytes.fromhex("2b6570")
+
+	@staticmethod
+	def _der_decode(data: bytes, offset: int = 0):
+		if offset + 2 > len(data):
+			raise ValueError("DER data truncated")
+		tag = data[offset]
+		length = data[offset + 1]
+		offset += 2
+		if length & 0x80:
+			length_bytes = length & 0x7f
+			if (length_bytes == 0) or (length_bytes > 4) or (offset + length_bytes > len(data)):
+				raise ValueError("invalid DER length encoding")
+			length = int.from_bytes(data[offset : offset + length_bytes], byteorder = "big")
+			offset += length_bytes
+		end = offset + length
+		if end > len(data):
+			raise ValueError("DER data truncated")
+		return (tag, data[offset : end], end)
+
+	@staticmethod
+	def _der_encode(tag: int, content: bytes):
+		if len(content) < 0x80:
+			length = bytes([ len(content) ])
+		else:
+			length_bytes = (len(content).bit_length() + 7) // 8
+			length = bytes([ 0x80 | length_bytes ]) + len(content).to_bytes(length_bytes, byteorder = "big")
+		return bytes([ tag ]) + length + content
+
+	@classmethod
+	def _parse_spki(cls, der_data: bytes):
+		(tag, spki, end) = cls._der_decode(der_data)
+		if (tag != 0x30) or (end != len(der_data)):
+			raise ValueError("SubjectPublicKeyInfo is not a single SEQUENCE")
+		(tag, algorithm_identifier, offset) = cls._der_decode(spki)
+		if tag != 0x30:
+			raise ValueError("AlgorithmIdentifier is not a SEQUENCE")
+		(tag, oid, _) = cls._der_decode(algorithm_identifier)
+		if tag != 0x06:
+			raise ValueError("algorithm is not an OBJECT IDENTIFIER")
+		(tag, bit_string, end) = cls._der_decode(spki, offset)
+		if (tag != 0x03) or (end != len(spki)):
+			raise ValueError("subjectPublicKey is not a BIT STRING")
+		if (len(bit_string) == 0) or (bit_string[0] != 0):
+			raise ValueError("subjectPublicKey BIT STRING is not byte-aligned")
+		return (oid, bit_string[1:])
+
+	@classmethod
+	def _rsa_pkcs1_to_spki(cls, pkcs1_data: bytes):
+		algorithm_identifier = cls._der_encode(0x30, cls._der_encode(0x06, cls._OID_RSA_ENCRYPTION) + cls._der_encode(0x05, b""))
+		return cls._der_encode(0x30, algorithm_identifier + cls._der_encode(0x03, b"\x00" + pkcs1_data))
+
+	@staticmethod
+	@functools.cache
+	def _decode_public_key(pubkey: str):
+		# Returns the DKIM key type and the key data as it is put into the
+		# 'p' field: For RSA this is the DER-encoded SubjectPublicKeyInfo,
+		# for Ed25519 only the 32 bytes raw public key.
+		if (rematch := EntryHelper._PEM_RE.search(pubkey)) is None:
+			raise ConfigurationSyntaxError("Cannot find PEM-encoded public key in 'pubkey'.")
+		try:
+			der_data = base64.b64decode("".join(rematch["data"].split()), validate = True)
+			if rematch["label"] == "RSA PUBLIC KEY":
+				der_data = EntryHelper._rsa_pkcs1_to_spki(der_data)
+			elif rematch["label"] != "PUBLIC KEY":
+				raise ValueError(f"unsupported PEM type \"{rematch['label']}\"")
+			(oid, key_data) = EntryHelper._parse_spki(der_data)
+		except ValueError as e:
+			raise ConfigurationSyntaxError(f"Unable to parse public key in 'pubkey': {str(e)}") from e
+
+		if oid == EntryHelper._OID_ED25519:
+			if len(key_data) != 32:
+				raise ConfigurationSyntaxError(f"Ed25519 public key in 'pubkey' has invalid length of {len(key_data)} bytes.")
+			return ("ed25519", base64.b64encode(key_data).decode("ascii"))
+		elif oid == EntryHelper._OID_RSA_ENCRYPTION:
+			return ("rsa", base64.b64encode(der_data).decode("ascii"))
+		else:
+			raise ConfigurationSyntaxError("Cannot determine public key type in 'pubkey'. Only RSA and Ed25519 supported currently.")
+
 	def dmarc(self, mailto: str):
 		return f"TXT	_dmarc	v=DMARC1;p=none;adkim=r;aspf=r;pct=100;rua=mailto:{mailto};ruf=mailto:{mailto}"
 
 	def dkim(self, keyname: str, pubkey: str, hashfnc: str | None = None):
 		fields = [ ("v", "DKIM1") ]
 
-		textkey = subprocess.check_output([ "openssl", "pkey", "-pubin", "-text", "-noout" ], input = pubkey.encode())
-		if b"ED25519 Public-Key:" in textkey:
-			# ED25519
-			fields.append(("k", "ed25519"))
-
-			pubkey = subprocess.check_output([ "openssl", "asn1parse", "-offset", "12", "-out", "-", "-noout" ], input = pubkey.encode())
-			assert(len(pubkey) == 32)
-			key_data = base64.b64encode(pubkey).decode("ascii")
-			fields.append(("p", key_data))
-		elif (b"RSA Public-Key:" in textkey) or (b"Exponent: 65537 (0x10001)" in textkey):
-			# RSA in early OpenSSL versions uses the former syntax; on latter
-			# versions this isn't obvious anymore and so we're looking for the
-			# 65537 exponent, which should be a dead giveaway (but it's not a
-			# clean implementation).
-			fields.append(("k", "rsa"))
+		(key_type, key_data) = self._decode_public_key(pubkey)
+		fields.append(("k", key_type))
+		if key_type == "rsa":
 			if hashfnc is None:
 				raise ConfigurationSyntaxError("RSA public key requires 'hashfnc' option to be set in the 'dkim' helper function.")
 			fields.append(("h", hashfnc))
-
-			pubkey = subprocess.check_output([ "openssl", "pkey", "-pubin", "-outform", "der" ], input = pubkey.encode())
-			key_data = base64.b64encode(pubkey).decode("ascii")
-			fields.append(("p", key_data))
-		else:
-			raise ConfigurationSyntaxError("Cannot determine public key type in 'pubkey'. Only RSA and Ed25519 supported currently.")
+		fields.append(("p", key_data))
 
 		destination = ";".join("%s=%s" % (key, value) for (key, value) in fields)
 		return f"TXT	{keyname}._domainkey	{destination}"
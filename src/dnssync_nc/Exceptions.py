@@ -24,4 +24,25 @@ class DNSSyncError(Exception): pass
 class NetcupAPIError(DNSSyncError): pass
 class ServerResponseError(NetcupAPIError): pass
 
+class PartialUpdateError(ServerResponseError):
+	def __init__(self, domainname: str, chunk_count: int, applied_chunks: list[int], failed_chunks: dict[int, Exception]):
+		self.domainname = domainname
+		self.chunk_count = chunk_count
+		self.applied_chunks = applied_chunks
+		self.failed_chunks = failed_chunks
+		failures = "; ".join(f"chunk {chunk_no + 1}: {str(exception)}" for (chunk_no, exception) in sorted(failed_chunks.items()))
+		applied = ", ".join(str(chunk_no + 1) for chunk_no in applied_chunks) or "none"
+		super().__init__(f"DNS records of {domainname} only partially updated: applied chunks {applied} of {chunk_count}; failed {failures}")
+
 class ConfigurationSyntaxError(DNSSyncError): pass
+
+class LayoutRenderError(DNSSyncError):
+	def __init__(self, layout_filename: str, message: str):
+		self.layout_filename = layout_filename
+		super().__init__(f"Unable to render or parse {layout_filename}: {message}")
+
+class StalePlanError(DNSSyncError):
+	def __init__(self, stale_zones: dict[str, tuple[int, int]]):
+		self.stale_zones = stale_zones
+		details = ", ".join(f"{domainname} (planned for serial {planned_serial}, now {current_serial})" for (domainname, (planned_serial, current_serial)) in stale_zones.items())
+		super().__init__(f"Refused to apply plan to {len(stale_zones)} zone(s) that changed since the plan was created: {details}")
@@ -0,0 +1,198 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import abc
+import time
+import errno
+import struct
+import select
+import ctypes
+import ctypes.util
+
+class FileWatcher(abc.ABC):
+	# Reports which files in a set of watched directories have been
+	# created, modified or removed. Events that arrive shortly after each
+	# other (e.g., an editor writing a backup file and renaming it) are
+	# collected and reported together.
+	def __init__(self, debounce: float = 0.25):
+		self._debounce = debounce
+		self._directories = set()
+
+	@property
+	def directories(self):
+		return self._directories
+
+	@staticmethod
+	def create(polling: bool = False, interval: float = 1, debounce: float = 0.25):
+		if not polling:
+			try:
+				return InotifyFileWatcher(debounce = debounce)
+			except OSError:
+				# Not on Linux or out of inotify instances
+				pass
+		return PollingFileWatcher(interval = interval, debounce = debounce)
+
+	@abc.abstractmethod
+	def watch(self, directories: "typing.Iterable[str]"):
+		pass
+
+	@abc.abstractmethod
+	def wait_for_changes(self, timeout: float | None = None):
+		# Returns the set of changed filenames (empty on timeout) or None if
+		# it is unknown what changed, in which case everything should be
+		# considered changed.
+		pass
+
+	def close(self):
+		pass
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+
+class PollingFileWatcher(FileWatcher):
+	def __init__(self, interval: float = 1, debounce: float = 0.25):
+		super().__init__(debounce = debounce)
+		self._interval = interval
+		self._state = { }
+
+	@staticmethod
+	def _snapshot(directories: "typing.Iterable[str]"):
+		snapshot = { }
+		for directory in directories:
+			try:
+				with os.scandir(directory) as entries:
+					for entry in entries:
+						try:
+							if entry.is_file():
+								stat_result = entry.stat()
+								snapshot[os.path.join(directory, entry.name)] = (stat_result.st_mtime_ns, stat_result.st_size)
+						except FileNotFoundError:
+							pass
+			except (FileNotFoundError, NotADirectoryError):
+				pass
+		return snapshot
+
+	def watch(self, directories: "typing.Iterable[str]"):
+		# Only newly added directories are scanned so that changes which
+		# happened in the already watched ones are not lost.
+		directories = set(os.path.realpath(directory) for directory in directories)
+		self._state = { filename: state for (filename, state) in self._state.items() if os.path.dirname(filename) in directories }
+		self._state.update(self._snapshot(directories - self._directories))
+		self._directories = directories
+
+	def _poll(self):
+		snapshot = self._snapshot(self._directories)
+		changed = set(filename for filename in (snapshot.keys() | self._state.keys()) if snapshot.get(filename) != self._state.get(filename))
+		self._state = snapshot
+		return changed
+
+	def wait_for_changes(self, timeout: float | None = None):
+		deadline = None if (timeout is None) else (time.monotonic() + timeout)
+		while True:
+			time.sleep(self._interval if (deadline is None) else max(0, min(self._interval, deadline - time.monotonic())))
+			changed = self._poll()
+			if len(changed) > 0:
+				time.sleep(self._debounce)
+				return changed | self._poll()
+			if (deadline is not None) and (time.monotonic() >= deadline):
+				return changed
+
+
+class InotifyFileWatcher(FileWatcher):
+	_IN_MODIFY = 0x2
+	_IN_ATTRIB = 0x4
+	_IN_CLOSE_WRITE = 0x8
+	_IN_MOVED_FROM = 0x40
+	_IN_MOVED_TO = 0x80
+	_IN_CREATE = 0x100
+	_IN_DELETE = 0x200
+	_IN_Q_OVERFLOW = 0x4000
+	_IN_NONBLOCK = 0o4000
+	_IN_CLOEXEC = 0o2000000
+	_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+	_EVENT_HEADER = struct.Struct("iIII")
+
+	def __init__(self, debounce: float = 0.25):
+		super().__init__(debounce = debounce)
+		libc_name = ctypes.util.find_library("c")
+		if libc_name is None:
+			raise OSError(errno.ENOSYS, "libc not found")
+		self._libc = ctypes.CDLL(libc_name, use_errno = True)
+		if not hasattr(self._libc, "inotify_init1"):
+			raise OSError(errno.ENOSYS, "inotify not supported on this platform")
+		self._fd = self._libc.inotify_init1(self._IN_NONBLOCK | self._IN_CLOEXEC)
+		if self._fd < 0:
+			raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+		self._directory_by_wd = { }
+
+	def watch(self, directories: "typing.Iterable[str]"):
+		directories = set(os.path.realpath(directory) for directory in directories)
+		for (wd, directory) in list(self._directory_by_wd.items()):
+			if directory not in directories:
+				self._libc.inotify_rm_watch(self._fd, wd)
+				del self._directory_by_wd[wd]
+		for directory in directories - set(self._directory_by_wd.values()):
+			wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self._WATCH_MASK)
+			if wd >= 0:
+				# Nonexistent directories are silently not watched
+				self._directory_by_wd[wd] = directory
+		self._directories = directories
+
+	def _read_events(self):
+		changed = set()
+		while True:
+			try:
+				data = os.read(self._fd, 64 * 1024)
+			except BlockingIOError:
+				return changed
+			offset = 0
+			while offset < len(data):
+				(wd, mask, _, name_length) = self._EVENT_HEADER.unpack_from(data, offset)
+				offset += self._EVENT_HEADER.size
+				name = data[offset : offset + name_length].rstrip(b"\x00")
+				offset += name_length
+				if mask & self._IN_Q_OVERFLOW:
+					return None
+				directory = self._directory_by_wd.get(wd)
+				if (directory is not None) and (len(name) > 0):
+					changed.add(os.path.join(directory, os.fsdecode(name)))
+
+	def wait_for_changes(self, timeout: float | None = None):
+		(readable, _, _) = select.select([ self._fd ], [ ], [ ], timeout)
+		if len(readable) == 0:
+			return set()
+		changed = self._read_events()
+		while (changed is not None) and (len(select.select([ self._fd ], [ ], [ ], self._debounce)[0]) > 0):
+			if (events := self._read_events()) is None:
+				changed = None
+			else:
+				changed |= events
+		return changed
+
+	def close(self):
+		if self._fd >= 0:
+			os.close(self._fd)
+			self._fd = -1
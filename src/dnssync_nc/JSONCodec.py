@@ -0,0 +1,64 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import json
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+class JSONCodec():
+	# Encodes to and decodes from UTF-8 JSON bytes. orjson is used if it is
+	# installed; the stdlib encoder is configured (compact separators, no
+	# escaping of non-ASCII characters) so that both produce the same bytes
+	# for the API requests of this tool, which only consist of strings,
+	# ints, booleans, None, lists and dicts. Floats are formatted differently
+	# (e.g., 1e+20 vs. 1e20). benchmark/check_json_codec.py verifies this.
+	_BACKENDS = [ "orjson", "json" ]
+
+	def __init__(self, backend: str = "auto"):
+		if backend == "auto":
+			backend = self.available_backends()[0]
+		if backend not in self.available_backends():
+			raise ValueError(f"JSON backend '{backend}' is not available, choose one of {', '.join(self.available_backends())}.")
+		self._backend = backend
+		if backend == "orjson":
+			self.encode = orjson.dumps
+			self.decode = orjson.loads
+		else:
+			self.encode = self._json_encode
+			self.decode = json.loads
+
+	@classmethod
+	def available_backends(cls):
+		return [ backend for backend in cls._BACKENDS if (backend != "orjson") or (orjson is not None) ]
+
+	@property
+	def backend(self):
+		return self._backend
+
+	@staticmethod
+	def _json_encode(data):
+		return json.dumps(data, separators = (",", ":"), ensure_ascii = False).encode("utf-8")
+
+	def __str__(self):
+		return f"JSONCodec<{self._backend}>"
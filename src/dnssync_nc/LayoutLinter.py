@@ -0,0 +1,148 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import enum
+import collections
+import dataclasses
+from .DNSRecords import DNSZone, DNSZoneLayout, RecordType
+
+class LintSeverity(enum.Enum):
+	WARNING = "warning"
+	ERROR = "error"
+
+@dataclasses.dataclass(frozen = True, slots = True)
+class LintIssue():
+	severity: LintSeverity
+	domainname: str
+	hostname: str
+	message: str
+
+	def __str__(self):
+		return f"{self.severity.value}: {self.domainname} {self.hostname}: {self.message}"
+
+
+class LayoutLinter():
+	# Finds problems that the API would otherwise only reject during a push
+	# (or, worse, accept). Every zone is indexed in a single pass over its
+	# records and all checks are lookups in those indexes, so linting takes
+	# linear time in the number of records.
+	_TXT_MAX_RDATA_LENGTH = 65535
+	_TXT_CHARACTER_STRING_LENGTH = 255
+	_UDP_PAYLOAD_SIZE = 1232
+	_ADDRESS_RECORD_TYPES = frozenset([ RecordType.A, RecordType.AAAA ])
+	_TARGET_RECORD_TYPES = frozenset([ RecordType.MX, RecordType.CNAME ])
+
+	@classmethod
+	def _txt_rdata_length(cls, text: str):
+		# The text is split into character strings of at most 255 bytes, each
+		# of which is preceded by its length.
+		length = len(text.encode())
+		return length + max(1, -(-length // cls._TXT_CHARACTER_STRING_LENGTH))
+
+	@staticmethod
+	def _covered_by_wildcard(hostname: str, types_by_hostname: dict):
+		while "." in hostname:
+			hostname = hostname.split(".", 1)[1]
+			if f"*.{hostname}" in types_by_hostname:
+				return True
+		return "*" in types_by_hostname
+
+	@staticmethod
+	def _delegated(hostname: str, delegated_hostnames: set[str]):
+		while True:
+			if hostname in delegated_hostnames:
+				return True
+			if "." not in hostname:
+				return False
+			hostname = hostname.split(".", 1)[1]
+
+	@staticmethod
+	def _in_zone_hostname(target: str, dns_zone: DNSZone):
+		# Returns the hostname of an in-zone target or None if the target is
+		# outside of the zone.
+		target = target.lower().rstrip(".")
+		domainname = dns_zone.domainname.lower()
+		if target in ( "@", domainname ):
+			return "@"
+		elif target.endswith("." + domainname):
+			return target[: -len(domainname) - 1]
+		else:
+			return None
+
+	def lint_zone(self, dns_zone: DNSZone):
+		domainname = dns_zone.domainname
+		types_by_hostname = collections.defaultdict(set)
+		cname_destinations = collections.defaultdict(set)
+		txt_lengths = collections.Counter()
+		delegated_hostnames = set()
+		seen = set()
+		target_records = [ ]
+
+		for record in dns_zone.entries:
+			hostname = record.hostname.lower()
+			if record in seen:
+				yield LintIssue(LintSeverity.WARNING, domainname, record.hostname, f"Duplicate record: {record}")
+			else:
+				seen.add(record)
+			types_by_hostname[hostname].add(record.record_type)
+			if record.record_type is RecordType.CNAME:
+				cname_destinations[hostname].add(record.destination.lower())
+			elif record.record_type is RecordType.TXT:
+				rdata_length = self._txt_rdata_length(record.destination)
+				if rdata_length > self._TXT_MAX_RDATA_LENGTH:
+					yield LintIssue(LintSeverity.ERROR, domainname, record.hostname, f"TXT record has {rdata_length} bytes of data, but at most {self._TXT_MAX_RDATA_LENGTH} are possible.")
+				txt_lengths[hostname] += rdata_length
+			elif (record.record_type is RecordType.NS) and (hostname != "@"):
+				delegated_hostnames.add(hostname)
+			if record.record_type in self._TARGET_RECORD_TYPES:
+				target_records.append(record)
+
+		for (hostname, destinations) in cname_destinations.items():
+			if hostname == "@":
+				yield LintIssue(LintSeverity.ERROR, domainname, hostname, "CNAME record at the zone apex conflicts with its SOA and NS records.")
+			other_types = types_by_hostname[hostname] - set([ RecordType.CNAME ])
+			if len(other_types) > 0:
+				yield LintIssue(LintSeverity.ERROR, domainname, hostname, f"CNAME record coexists with {', '.join(sorted(record_type.value for record_type in other_types))} record(s).")
+			if len(destinations) > 1:
+				yield LintIssue(LintSeverity.ERROR, domainname, hostname, f"Multiple CNAME records: {', '.join(sorted(destinations))}")
+
+		for (hostname, length) in txt_lengths.items():
+			if length > self._UDP_PAYLOAD_SIZE:
+				yield LintIssue(LintSeverity.WARNING, domainname, hostname, f"TXT records have {length} bytes of data, answers will not fit into a {self._UDP_PAYLOAD_SIZE} byte UDP response and require TCP.")
+
+		for record in target_records:
+			target_hostname = self._in_zone_hostname(record.destination, dns_zone)
+			if (target_hostname is None) or (target_hostname == "@"):
+				continue
+			if (len(delegated_hostnames) > 0) and self._delegated(target_hostname, delegated_hostnames):
+				# Names in delegated subdomains are served by other name
+				# servers and cannot be checked here
+				continue
+			target_types = types_by_hostname.get(target_hostname)
+			if target_types is None:
+				if not self._covered_by_wildcard(target_hostname, types_by_hostname):
+					yield LintIssue(LintSeverity.ERROR, domainname, record.hostname, f"{record.record_type.value} target {record.destination} does not exist in the zone.")
+			elif (record.record_type is RecordType.MX) and (len(target_types & self._ADDRESS_RECORD_TYPES) == 0):
+				yield LintIssue(LintSeverity.WARNING, domainname, record.hostname, f"MX target {record.destination} has no A or AAAA record.")
+
+	def lint(self, layout: DNSZoneLayout):
+		for domainname in layout.domainnames:
+			yield from self.lint_zone(layout[domainname])
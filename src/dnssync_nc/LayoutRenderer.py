@@ -0,0 +1,170 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import traceback
+import contextlib
+import concurrent.futures
+from .DNSRecords import DNSZoneParser, DNSZoneLayout
+from .DependencyTrackingLookup import DependencyTrackingLookup
+from .TemplateCache import TemplateCache
+from .EntryHelper import EntryHelper
+from .Timings import Timings
+from .Exceptions import LayoutRenderError
+
+class _RemoteTraceback(Exception):
+	def __init__(self, traceback_text: str):
+		self._traceback_text = traceback_text
+
+	def __str__(self):
+		return f"\n\"\"\"\n{self._traceback_text}\"\"\""
+
+class DomainFilter():
+	# Available to layout templates as 'domain_filter'. When only some
+	# domains are processed (e.g., with --domain-name), templates can use
+	# it to skip generating all other zones, e.g.:
+	#   % if "my-domain.de" in domain_filter:
+	def __init__(self, domainnames: "typing.Iterable[str] | None" = None):
+		self._domainnames = None if (domainnames is None) else frozenset(domainnames)
+
+	@property
+	def active(self):
+		return self._domainnames is not None
+
+	@property
+	def domainnames(self):
+		return self._domainnames
+
+	def __contains__(self, domainname: str):
+		return (self._domainnames is None) or (domainname in self._domainnames)
+
+	def __repr__(self):
+		return "DomainFilter<all>" if (self._domainnames is None) else f"DomainFilter<{', '.join(sorted(self._domainnames))}>"
+
+
+class LayoutRenderer():
+	# Renders layout files as Mako templates and parses the result. Multiple
+	# layout files can be rendered in parallel worker processes; results
+	# (and errors) are always reported in the order the files were given.
+	def __init__(self, include_dirs: list[str], template_cache: TemplateCache | None = None, timings: Timings | None = None):
+		self._include_dirs = include_dirs
+		self._template_cache = template_cache
+		self._timings = timings
+		if template_cache is None:
+			self._lookup = DependencyTrackingLookup([ "." ] + include_dirs, strict_undefined = True)
+		else:
+			self._lookup = template_cache.create_lookup([ "." ] + include_dirs, lookup_class = DependencyTrackingLookup, strict_undefined = True)
+
+	@property
+	def lookup(self):
+		return self._lookup
+
+	def _phase(self, name: str):
+		if self._timings is None:
+			return contextlib.nullcontext()
+		return self._timings.phase(name)
+
+	def render(self, layout_filename: str, domainnames: "typing.Iterable[str] | None" = None):
+		with self._phase("render"):
+			template = self._lookup.get_template(layout_filename)
+			template_vars = {
+				"entry":			EntryHelper(),
+				"domain_filter":	DomainFilter(domainnames),
+			}
+			return template.render(**template_vars)
+
+	def parse(self, rendered: str, domainnames: "typing.Iterable[str] | None" = None):
+		with self._phase("parse"):
+			parser = DNSZoneParser()
+			return parser.parse(rendered, domainnames = None if (domainnames is None) else frozenset(domainnames))
+
+	def _render_compact(self, layout_filename: str, keep_rendered: bool, domainnames: list[str] | None):
+		# Runs in a worker process. Layouts are returned in their compact
+		# form, which is considerably smaller and faster to pickle. Errors
+		# are returned as text since not all exceptions (e.g., those of
+		# Mako) can be pickled.
+		self._timings = Timings()
+		(hits, misses) = (self._template_cache.hits, self._template_cache.misses) if (self._template_cache is not None) else (0, 0)
+		result = {
+			"rendered":	None,
+			"layout":	None,
+			"error":	None,
+		}
+		try:
+			rendered = self.render(layout_filename, domainnames)
+			if keep_rendered:
+				result["rendered"] = rendered
+			result["layout"] = self.parse(rendered, domainnames).serialize_compact()
+		except Exception as e:
+			result["error"] = (f"{e.__class__.__name__}: {str(e)}", traceback.format_exc())
+		result["timings"] = self._timings.serialize()
+		if self._template_cache is not None:
+			result["template_cache"] = (self._template_cache.hits - hits, self._template_cache.misses - misses)
+		return result
+
+	def _process_result(self, layout_filename: str, result: dict):
+		if self._timings is not None:
+			self._timings.merge(Timings.deserialize(result["timings"]))
+		if (self._template_cache is not None) and ("template_cache" in result):
+			self._template_cache.add_statistics(*result["template_cache"])
+		error = None
+		if result["error"] is not None:
+			(message, traceback_text) = result["error"]
+			error = LayoutRenderError(layout_filename, message)
+			error.__cause__ = _RemoteTraceback(traceback_text)
+		layout = None if (result["layout"] is None) else DNSZoneLayout.deserialize_compact(result["layout"])
+		return (layout_filename, result["rendered"], layout, error)
+
+	def render_all(self, layout_filenames: list[str], jobs: int = 1, keep_rendered: bool = False, domainnames: list[str] | None = None):
+		# Yields (layout_filename, rendered, layout, error) in order, rendered
+		# is only given if requested. Either layout or error is None. If
+		# domainnames is given, the layouts only contain those domains.
+		if (jobs == 1) or (len(layout_filenames) <= 1):
+			for layout_filename in layout_filenames:
+				(rendered, layout, error) = (None, None, None)
+				try:
+					rendered = self.render(layout_filename, domainnames)
+					layout = self.parse(rendered, domainnames)
+				except Exception as e:
+					# Same error as reported from a worker process
+					error = LayoutRenderError(layout_filename, f"{e.__class__.__name__}: {str(e)}")
+					error.__cause__ = e
+				yield (layout_filename, rendered if keep_rendered else None, layout, error)
+			return
+
+		template_cache_directory = None if (self._template_cache is None) else self._template_cache.module_directory
+		with concurrent.futures.ProcessPoolExecutor(max_workers = min(jobs, len(layout_filenames)), initializer = _initialize_worker, initargs = (self._include_dirs, template_cache_directory)) as executor:
+			futures = [ executor.submit(_render_in_worker, layout_filename, keep_rendered, domainnames) for layout_filename in layout_filenames ]
+			try:
+				for (layout_filename, future) in zip(layout_filenames, futures):
+					yield self._process_result(layout_filename, future.result())
+			finally:
+				for future in futures:
+					future.cancel()
+
+_worker_renderer = None
+
+def _initialize_worker(include_dirs: list[str], template_cache_directory: str | None):
+	global _worker_renderer
+	template_cache = None if (template_cache_directory is None) else TemplateCache(template_cache_directory)
+	_worker_renderer = LayoutRenderer(include_dirs, template_cache = template_cache)
+
+def _render_in_worker(layout_filename: str, keep_rendered: bool, domainnames: list[str] | None):
+	return _worker_renderer._render_compact(layout_filename, keep_rendered, domainnames)
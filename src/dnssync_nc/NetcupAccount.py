@@ -0,0 +1,59 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import json
+import dataclasses
+from .Exceptions import ConfigurationSyntaxError
+
+@dataclasses.dataclass(slots = True)
+class NetcupAccount():
+	# One netcup customer account. A credentials file either contains a
+	# single account object or, under the "accounts" key, a list of them.
+	# Every account can optionally list the layout files which are pushed
+	# to it and the domains which are pulled from it.
+	customer: int | str
+	api_key: str
+	api_password: str
+	json_endpoint: str
+	name: str | None = None
+	layouts: list[str] = dataclasses.field(default_factory = list)
+	domains: list[str] = dataclasses.field(default_factory = list)
+
+	@property
+	def display_name(self):
+		return self.name if (self.name is not None) else f"customer {self.customer}"
+
+	@classmethod
+	def deserialize(cls, data: dict):
+		missing = [ key for key in [ "customer", "api_key", "api_password", "json_endpoint" ] if key not in data ]
+		if len(missing) > 0:
+			raise ConfigurationSyntaxError(f"Account definition lacks required key(s): {', '.join(missing)}")
+		return cls(customer = data["customer"], api_key = data["api_key"], api_password = data["api_password"], json_endpoint = data["json_endpoint"], name = data.get("name"), layouts = list(data.get("layouts", [ ])), domains = list(data.get("domains", [ ])))
+
+	@classmethod
+	def read_credentials_file(cls, filename: str):
+		with open(filename) as f:
+			data = json.load(f)
+		if "accounts" not in data:
+			return [ cls.deserialize(data) ]
+		if (not isinstance(data["accounts"], list)) or (len(data["accounts"]) == 0):
+			raise ConfigurationSyntaxError(f"{filename}: 'accounts' needs to be a non-empty list of account definitions.")
+		return [ cls.deserialize(account_data) for account_data in data["accounts"] ]
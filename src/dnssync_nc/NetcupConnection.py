@@ -19,67 +19,189 @@
 #
 #	Johannes Bauer <JohannesBauer@gmx.de>
 
-import json
+import gzip
+import time
 import collections
+import contextlib
+import functools
+import dataclasses
+import threading
+import concurrent.futures
 import requests
-from dnssync_nc import DNSZone, DNSRecord, DNSZoneLayout
-from .Exceptions import ServerResponseError
+from dnssync_nc import DNSZone, DNSRecord, DNSZoneLayout, DNSZoneDiff, ZoneCache, SessionStore, PushJournal, PushCheckpoint, RequestScheduler, JSONCodec, NetcupAccount, Timings
+from .DNSRecords import RecordType
+from .Exceptions import ServerResponseError, PartialUpdateError, StalePlanError, ConfigurationSyntaxError
 
 class NetcupConnection():
-	def __init__(self, json_endpoint_uri, customer, api_key, api_password):
+	# Status code the API responds with when the session ID is not (or no
+	# longer) valid, e.g., because the session timed out.
+	_INVALID_SESSION_STATUS_CODE = 4001
+
+	# Actions which can safely be sent again if it is unclear whether the
+	# server processed them
+	_IDEMPOTENT_ACTIONS = frozenset([ "login", "logout", "infoDnsZone", "infoDnsRecords" ])
+
+	# Request bodies smaller than this are never compressed, the gzip
+	# overhead would outweigh the savings
+	_COMPRESSION_MIN_SIZE = 1024
+
+	def __init__(self, json_endpoint_uri, customer, api_key, api_password, jobs: int = 1, commit_jobs: int = 1, zone_cache: ZoneCache | None = None, session_store: SessionStore | None = None, push_journal: PushJournal | None = None, push_checkpoint: PushCheckpoint | None = None, scheduler: RequestScheduler | None = None, chunk_size: int | None = None, chunk_jobs: int = 1, json_codec: JSONCodec | None = None, compress_requests: bool = False, timings: Timings | None = None):
+		if jobs < 1:
+			raise ValueError(f"Number of parallel jobs must be at least 1, but got {jobs}.")
+		if commit_jobs < 1:
+			raise ValueError(f"Number of parallel commit jobs must be at least 1, but got {commit_jobs}.")
+		if (chunk_size is not None) and (chunk_size < 1):
+			raise ValueError(f"Chunk size must be at least 1, but got {chunk_size}.")
+		if chunk_jobs < 1:
+			raise ValueError(f"Number of parallel chunk jobs must be at least 1, but got {chunk_jobs}.")
 		self._uri = json_endpoint_uri
 		self._credentials = {
 			"customer":		customer,
 			"api_key":		api_key,
 			"api_password":	api_password,
 		}
-		self._session = requests.Session()
+		self._jobs = jobs
+		self._commit_jobs = commit_jobs
+		self._chunk_size = chunk_size
+		self._chunk_jobs = chunk_jobs
+		self._zone_cache = zone_cache
+		self._session_store = session_store
+		self._push_journal = push_journal
+		self._push_checkpoint = push_checkpoint
+		self._json_codec = json_codec if (json_codec is not None) else JSONCodec()
+		self._scheduler = scheduler if (scheduler is not None) else RequestScheduler(json_codec = self._json_codec)
+		self._compress_requests = compress_requests
+		self._timings = timings
+		self._login_lock = threading.Lock()
+		self._thread_local = threading.local()
 		self._session_id = None
 
 	@property
 	def logged_in(self):
 		return self._session_id is not None
 
+	@property
+	def scheduler(self):
+		return self._scheduler
+
+	@property
+	def timings(self):
+		return self._timings
+
+	def _phase(self, name: str):
+		if self._timings is None:
+			return contextlib.nullcontext()
+		return self._timings.phase(name)
+
+	@property
+	def _session(self):
+		# requests.Session is not guaranteed to be thread-safe, hence every
+		# worker thread gets its own HTTP session (and connection pool).
+		if not hasattr(self._thread_local, "session"):
+			self._thread_local.session = requests.Session()
+		return self._thread_local.session
+
+	@contextlib.contextmanager
+	def _worker_pool(self, max_workers: int | None = None):
+		executor = concurrent.futures.ThreadPoolExecutor(max_workers = max_workers or self._jobs, thread_name_prefix = "netcup")
+		try:
+			yield executor
+		except BaseException:
+			executor.shutdown(wait = True, cancel_futures = True)
+			raise
+		executor.shutdown(wait = True)
+
+	def _post(self, payload_data: bytes, idempotent: bool):
+		# Responses are transparently decompressed by requests, which always
+		# announces gzip support. Compressed requests need to be enabled
+		# explicitly; when the endpoint rejects them as unsupported, they
+		# are disabled and the request is sent again uncompressed.
+		if self._compress_requests and (len(payload_data) >= self._COMPRESSION_MIN_SIZE):
+			compressed_data = gzip.compress(payload_data, mtime = 0)
+			response = self._scheduler.execute(lambda: self._session.post(self._uri, data = compressed_data, headers = { "Content-Encoding": "gzip" }, timeout = self._scheduler.timeout), idempotent = idempotent)
+			if response.status_code != 415:
+				return response
+			self._compress_requests = False
+		return self._scheduler.execute(lambda: self._session.post(self._uri, data = payload_data, timeout = self._scheduler.timeout), idempotent = idempotent)
+
 	def _action(self, action_name, params):
 		payload = {
 			"action":	action_name,
 			"param":	params,
 		}
-		payload_data = json.dumps(payload)
-		response = self._session.post(self._uri, data = payload_data)
+		payload_data = self._json_codec.encode(payload)
+		t0 = time.perf_counter()
+		response = self._post(payload_data, idempotent = action_name in self._IDEMPOTENT_ACTIONS)
+		if self._timings is not None:
+			self._timings.record_request(action_name, time.perf_counter() - t0, len(payload_data), len(response.content))
+		try:
+			data = self._json_codec.decode(response.content)
+		except ValueError as e:
+			raise ServerResponseError(f"Invalid response to '{action_name}' request: HTTP {response.status_code}") from e
 		return {
 			"status":	response.status_code,
-			"data":		response.json(),
+			"data":		data,
 		}
 
+	def _session_params(self, params: dict, session_id: str):
+		params = dict(params)
+		params.update({
+			"apikey":			self._credentials["api_key"],
+			"apisessionid":		session_id,
+			"customernumber":	str(self._credentials["customer"]),
+		})
+		return params
+
+	def _session_rejected(self, response: dict):
+		return (response["status"] == 200) and (response["data"]["status"] == "error") and (response["data"]["statuscode"] == self._INVALID_SESSION_STATUS_CODE)
+
 	def _session_action(self, action_name: str, params = None):
-		if self._session_id is None:
+		session_id = self._session_id
+		if session_id is None:
 			raise ValueError(f"Cannot execute action '{action_name}' without an established session.")
 
 		if params is None:
 			params = { }
-		params.update({
-			"apikey":			self._credentials["api_key"],
-			"apisessionid":		self._session_id,
-			"customernumber":	str(self._credentials["customer"]),
-		})
-		return self._action(action_name, params)
+		response = self._action(action_name, self._session_params(params, session_id))
+		if self._session_rejected(response):
+			# Session has expired (or a stale persisted session was used), log
+			# in again and retry exactly once. Another thread might already
+			# have done so in the meantime.
+			with self._login_lock:
+				if self._session_id == session_id:
+					self.login()
+			response = self._action(action_name, self._session_params(params, self._session_id))
+		return response
 
 	def login(self):
-		response = self._action("login", {
-			"apikey":			self._credentials["api_key"],
-			"apipassword":		self._credentials["api_password"],
-			"customernumber":	str(self._credentials["customer"]),
-		})
+		with self._phase("login"):
+			response = self._action("login", {
+				"apikey":			self._credentials["api_key"],
+				"apipassword":		self._credentials["api_password"],
+				"customernumber":	str(self._credentials["customer"]),
+			})
 		if response["status"] == 200:
 			if response["data"]["status"] == "success":
 				self._session_id = response["data"]["responsedata"]["apisessionid"]
+				if self._session_store is not None:
+					self._session_store.put(self._credentials["customer"], self._session_id)
 			else:
 				raise ServerResponseError(f"Login to netcup failed for customer ID {self._credentials['customer']}: {response['data']['longmessage']} (status code {response['data']['statuscode']})")
 		return response
 
 	def logout(self):
-		return self._session_action("logout")
+		with self._phase("logout"):
+			response = self._session_action("logout")
+		if self._session_store is not None:
+			self._session_store.remove(self._credentials["customer"])
+		self._session_id = None
+		return response
+
+	def resume_or_login(self):
+		if self._session_store is not None:
+			self._session_id = self._session_store.get(self._credentials["customer"])
+		if self._session_id is None:
+			self.login()
 
 	def _info_dns_records(self, domainname: str):
 		response = self._session_action("infoDnsRecords", {
@@ -92,7 +214,7 @@ class NetcupConnection():
 			return [ ]
 		if response["data"]["status"] != "success":
 			raise ServerResponseError("Unable to retrieve DNS records (no 'success' status): %s" % (response["data"]["longmessage"]))
-		return [ DNSRecord.deserialize(record_dict) for record_dict in response["data"]["responsedata"]["dnsrecords"] ]
+		return DNSRecord.deserialize_many(response["data"]["responsedata"]["dnsrecords"])
 
 	def _info_dns_zone(self, domainname: str):
 		response = self._session_action("infoDnsZone", {
@@ -104,15 +226,57 @@ class NetcupConnection():
 			raise ServerResponseError(f"Unable to get DNS zone information customer ID {self._credentials['customer']}: {response['data']['longmessage']} (status code {response['data']['statuscode']})")
 		return DNSZone.deserialize(response["data"]["responsedata"])
 
-	def _get_dns_zone(self, domainname: str):
-		dns_zone = self._info_dns_zone(domainname)
-		dns_zone.entries += self._info_dns_records(domainname)
+	def _get_dns_zone(self, domainname: str, dns_zone: DNSZone | None = None):
+		# dns_zone may be given if the zone information has already been
+		# retrieved, then only the records are added to it.
+		if dns_zone is None:
+			dns_zone = self._info_dns_zone(domainname)
+		if self._zone_cache is not None:
+			records = self._zone_cache.get(domainname, dns_zone.serial)
+			if records is None:
+				records = self._info_dns_records(domainname)
+				self._zone_cache.put(domainname, dns_zone.serial, records)
+		else:
+			records = self._info_dns_records(domainname)
+		dns_zone.entries += records
 		return dns_zone
 
+	def _submit_zone_fetch(self, executor: "concurrent.futures.Executor", domainname: str):
+		if self._zone_cache is None:
+			# Zone information and records are independent of each other, so
+			# both requests are issued at once.
+			return (executor.submit(self._info_dns_zone, domainname), executor.submit(self._info_dns_records, domainname))
+		else:
+			# The serial needs to be known before it can be decided if the
+			# records have to be retrieved at all.
+			return (executor.submit(self._get_dns_zone, domainname), None)
+
+	@staticmethod
+	def _fetched_zone(futures: tuple):
+		(zone_future, records_future) = futures
+		dns_zone = zone_future.result()
+		if records_future is not None:
+			dns_zone.entries += records_future.result()
+		return dns_zone
+
+	def iter_dns_zones(self, domainnames: "typing.Iterable[str]"):
+		# Yields the zones in the order the domains were given, each as soon
+		# as it has been retrieved. Only a limited number of zones is fetched
+		# ahead, so memory does not depend on the number of domains as long as
+		# the caller does not keep the zones around.
+		window = 2 * self._jobs
+		pending = collections.deque()
+		with self._phase("fetch"), self._worker_pool() as executor:
+			for domainname in domainnames:
+				pending.append(self._submit_zone_fetch(executor, domainname))
+				if len(pending) >= window:
+					yield self._fetched_zone(pending.popleft())
+			while len(pending) > 0:
+				yield self._fetched_zone(pending.popleft())
+
 	def get_dns_zone_layout(self, domainnames: list[str]):
-		layout = collections.OrderedDict()
-		for domainname in domainnames:
-			layout[domainname] = self._get_dns_zone(domainname)
+		domainnames = list(domainnames)
+		layout = collections.OrderedDict(zip(domainnames, self.iter_dns_zones(domainnames)))
 		return DNSZoneLayout(layout)
 
 	def _update_dns_records(self, domainname: str, dns_record_set: list[dict]):
@@ -126,6 +290,43 @@ class NetcupConnection():
 			raise ServerResponseError(f"Unable to update DNS records of {domainname}: HTTP {response['status']}")
 		if response["data"]["status"] != "success":
 			raise ServerResponseError(f"Unable to update DNS records of {domainname}: {response['data']['longmessage']} (status code {response['data']['statuscode']})")
+		responsedata = response["data"]["responsedata"]
+		if isinstance(responsedata, dict) and ("dnsrecords" in responsedata):
+			return DNSRecord.deserialize_many(responsedata["dnsrecords"])
+		return None
+
+	def _update_dns_record_chunks(self, domainname: str, chunks: list[list[dict]]):
+		if len(chunks) == 1:
+			return self._update_dns_records(domainname, chunks[0])
+
+		applied_chunks = [ ]
+		failed_chunks = { }
+		records = None
+		if self._chunk_jobs == 1:
+			for (chunk_no, chunk) in enumerate(chunks):
+				try:
+					records = self._update_dns_records(domainname, chunk)
+					applied_chunks.append(chunk_no)
+				except Exception as e:
+					# Stop at the first failure, later chunks are not attempted
+					failed_chunks[chunk_no] = e
+					break
+		else:
+			# Chunks never share a hostname and are therefore independent of
+			# each other. It is unknown which request the server processes
+			# last, so the resulting record set is not known afterwards.
+			with self._worker_pool(self._chunk_jobs) as executor:
+				futures = [ executor.submit(self._update_dns_records, domainname, chunk) for chunk in chunks ]
+				for (chunk_no, future) in enumerate(futures):
+					try:
+						future.result()
+						applied_chunks.append(chunk_no)
+					except Exception as e:
+						failed_chunks[chunk_no] = e
+
+		if len(failed_chunks) > 0:
+			raise PartialUpdateError(domainname, len(chunks), applied_chunks, failed_chunks)
+		return records
 
 	def _update_dns_zone(self, dns_zone: DNSZone):
 		assert(isinstance(dns_zone, DNSZone))
@@ -138,53 +339,168 @@ class NetcupConnection():
 		else:
 			raise ServerResponseError("Unable to update DNS zone:", response)
 
-	def _push_dns_zone(self, current_zone: DNSZone, new_zone: DNSZone, show_diff: bool = False, commit: bool = False):
-		if current_zone != new_zone:
-			if show_diff:
-				print(f"-{current_zone}")
-				print(f"+{new_zone}")
-			if commit:
-				self._update_dns_zone(new_zone)
-
-		added_records = [ ]
-		current_records = set(current_zone.entries)
-		for new_record in new_zone.entries:
-			if new_record in current_records:
-				# Already present, no change necessary
-				current_records.remove(new_record)
+	def _record_pushed_zone(self, diff: DNSZoneDiff, serial: int | None, records: list[DNSRecord] | None):
+		if self._zone_cache is not None:
+			if (serial is None) or (records is None):
+				# Server did not tell us the resulting record set
+				self._zone_cache.invalidate(diff.domainname)
 			else:
-				added_records.append(new_record)
+				self._zone_cache.put(diff.domainname, serial, records)
+		if self._push_journal is not None:
+			self._push_journal.put(diff.domainname, diff.content_hash(), serial)
+		if self._push_checkpoint is not None:
+			self._push_checkpoint.put(diff.domainname, diff.content_hash(), serial)
+
+	def _commit_dns_zone_diff(self, diff: DNSZoneDiff):
+		with self._phase("commit"):
+			serial = diff.current_zone.serial
+			records = diff.current_zone.entries if diff.current_records_known else None
+			if diff.zone_changed:
+				serial = self._update_dns_zone(diff.new_zone).serial
+			if diff.records_changed:
+				records = self._update_dns_record_chunks(diff.domainname, diff.serialize_record_chunks(self._chunk_size))
+				if (self._zone_cache is not None) or (self._push_journal is not None) or (self._push_checkpoint is not None):
+					# Every record update yields a new serial, retrieve it
+					serial = self._info_dns_zone(diff.domainname).serial
+			self._record_pushed_zone(diff, serial, records)
+		return diff
+
+	def _diff_dns_zone(self, new_zone: DNSZone, commit_executor: "concurrent.futures.Executor | None", current_zone_info: DNSZone | None = None):
+		with self._phase("fetch"):
+			current_zone = self._get_dns_zone(new_zone.domainname, current_zone_info)
+		with self._phase("diff"):
+			diff = DNSZoneDiff.compute(current_zone, new_zone)
+		commit_future = None
+		if commit_executor is not None:
+			if diff.changed:
+				# Start committing right away instead of waiting for the
+				# remaining zones to be retrieved.
+				commit_future = commit_executor.submit(self._commit_dns_zone_diff, diff)
+			else:
+				if self._push_journal is not None:
+					self._push_journal.put(diff.domainname, new_zone.content_hash(), current_zone.serial)
+				if self._push_checkpoint is not None:
+					self._push_checkpoint.put(diff.domainname, new_zone.content_hash(), current_zone.serial)
+		return (diff, commit_future)
+
+	def _previously_pushed_serials(self, new_zone: DNSZone, incremental: bool):
+		# Serials the server reported after this exact zone content was last
+		# pushed, according to the checkpoint of an interrupted push and (for
+		# an incremental push) the push journal.
+		content_hash = new_zone.content_hash()
+		entries = [ ]
+		if self._push_checkpoint is not None:
+			entries.append(self._push_checkpoint.get(new_zone.domainname))
+		if incremental and (self._push_journal is not None):
+			entries.append(self._push_journal.get(new_zone.domainname))
+		return set(serial for (entry_hash, serial) in filter(None, entries) if (entry_hash == content_hash) and (serial is not None))
+
+	def _push_dns_zone(self, new_zone: DNSZone, commit_executor: "concurrent.futures.Executor | None", incremental: bool = False):
+		# A zone that was already pushed with the same content is skipped if
+		# the server still has the serial it reported back then, i.e., if
+		# nobody changed it since. Only the zone information, but not its
+		# records, needs to be retrieved for this.
+		if len(serials := self._previously_pushed_serials(new_zone, incremental)) == 0:
+			return self._diff_dns_zone(new_zone, commit_executor)
+		with self._phase("fetch"):
+			current_zone_info = self._info_dns_zone(new_zone.domainname)
+		if current_zone_info.serial in serials:
+			return (None, None)
+		return self._diff_dns_zone(new_zone, commit_executor, current_zone_info)
 
-		removed_records = list(sorted(current_records))
+	def _run_pipeline(self, prepare_fnc: "typing.Callable", items: list, show_diff: bool, commit: bool):
+		# prepare_fnc is run for every item in the fetch pool and returns the
+		# diff of the zone (or None if it is skipped) and possibly a future
+		# of its commit, which it has already submitted to the commit pool.
+		diffs = [ ]
+		commit_futures = [ ]
+		with self._worker_pool(self._commit_jobs) as commit_executor, self._worker_pool(self._jobs) as fetch_executor:
+			futures = [ fetch_executor.submit(prepare_fnc, item, commit_executor if commit else None) for item in items ]
 
-		if show_diff:
-			for record in removed_records:
-				print(f"-{current_zone.domainname} {record}")
-			for record in added_records:
-				print(f"+{current_zone.domainname} {record}")
+			# Collect results in the given order so that the diff output is
+			# deterministic regardless of which zone finished first.
+			for future in futures:
+				(diff, commit_future) = future.result()
+				if diff is None:
+					continue
+				if show_diff:
+					diff.print()
+				diffs.append(diff)
+				if commit_future is not None:
+					commit_futures.append(commit_future)
 
-		if commit:
-			dns_record_set = [ ]
-			for record in removed_records:
-				dns_record_set.append(record.serialize(delete_record = True))
-			for record in added_records:
-				dns_record_set.append(record.serialize())
-			self._update_dns_records(current_zone.domainname, dns_record_set)
+			for commit_future in commit_futures:
+				commit_future.result()
+		return diffs
 
-	def push_dns_zone_layout(self, new_layout: DNSZoneLayout, show_diff: bool = False, commit: bool = False):
-		current_layout = self.get_dns_zone_layout(new_layout.domainnames)
-		for domainname in current_layout.domainnames:
-			self._push_dns_zone(current_layout[domainname], new_layout[domainname], show_diff = show_diff, commit = commit)
+	def push_dns_zone_layout(self, new_layout: DNSZoneLayout, show_diff: bool = False, commit: bool = False, incremental: bool = False):
+		prepare_fnc = functools.partial(self._push_dns_zone, incremental = incremental)
+		return self._run_pipeline(prepare_fnc, [ new_layout[domainname] for domainname in new_layout.domainnames ], show_diff = show_diff, commit = commit)
+
+	def _update_dynamic_zone(self, domainname: str, records: list[DNSRecord], commit_executor: "concurrent.futures.Executor | None"):
+		with self._phase("fetch"):
+			current_zone = self._get_dns_zone(domainname)
+		# All records given for a type and hostname together replace the
+		# records of that type and hostname, so that multiple addresses can
+		# be set for the same host. Repeated addresses are only set once.
+		replaced = set((record.record_type, record.hostname) for record in records)
+		entries = [ entry for entry in current_zone.entries if (entry.record_type, entry.hostname) not in replaced ] + list(dict.fromkeys(records))
+		with self._phase("diff"):
+			diff = DNSZoneDiff.compute(current_zone, dataclasses.replace(current_zone, entries = entries))
+		commit_future = None
+		if (commit_executor is not None) and diff.changed:
+			commit_future = commit_executor.submit(self._commit_dns_zone_diff, diff)
+		return (diff, commit_future)
+
+	def update_dynamic_records(self, updates: "typing.Iterable[tuple[str, str, str, str]]", show_diff: bool = False, commit: bool = True):
+		# Sets A or AAAA records given as (domainname, hostname, type,
+		# address) without rendering or comparing a whole layout. Only the
+		# affected zones are retrieved (records possibly from the cache) and
+		# each changed zone is updated with a single request; zones in which
+		# all addresses are already set are left alone.
+		records_by_domainname = collections.OrderedDict()
+		for (domainname, hostname, record_type, address) in updates:
+			record_type = RecordType(record_type)
+			if record_type not in [ RecordType.A, RecordType.AAAA ]:
+				raise ValueError(f"Only A and AAAA records can be updated dynamically, but got a {record_type.value} record for {hostname} in {domainname}.")
+			records_by_domainname.setdefault(domainname, [ ]).append(DNSRecord(record_type = record_type, hostname = hostname, destination = address))
+		return self._run_pipeline(lambda item, commit_executor: self._update_dynamic_zone(item[0], item[1], commit_executor), list(records_by_domainname.items()), show_diff = show_diff, commit = commit)
+
+	def _verify_planned_diff(self, diff: DNSZoneDiff, commit_executor: "concurrent.futures.Executor | None", stale_zones: dict):
+		with self._phase("fetch"):
+			current_serial = self._info_dns_zone(diff.domainname).serial
+		if current_serial != diff.current_zone.serial:
+			stale_zones[diff.domainname] = (diff.current_zone.serial, current_serial)
+			return (None, None)
+		commit_future = None
+		if commit_executor is not None:
+			commit_future = commit_executor.submit(self._commit_dns_zone_diff, diff)
+		return (diff, commit_future)
+
+	def apply_dns_zone_diffs(self, diffs: list[DNSZoneDiff], show_diff: bool = False, commit: bool = True):
+		# Only the serial of each zone is retrieved to ensure the zone was not
+		# modified since the diff was computed; records are not retrieved.
+		stale_zones = { }
+		applied_diffs = self._run_pipeline(lambda diff, commit_executor: self._verify_planned_diff(diff, commit_executor, stale_zones), diffs, show_diff = show_diff, commit = commit)
+		if len(stale_zones) > 0:
+			raise StalePlanError({ domainname: stale_zones[domainname] for domainname in (diff.domainname for diff in diffs) if domainname in stale_zones })
+		return applied_diffs
 
 	def __enter__(self):
-		self.login()
+		self.resume_or_login()
 		return self
 
 	def __exit__(self, *args):
-		self.logout()
+		if self._session_store is None:
+			self.logout()
+
+	@classmethod
+	def from_account(cls, account: NetcupAccount, **kwargs):
+		return cls(json_endpoint_uri = account.json_endpoint, customer = account.customer, api_password = account.api_password, api_key = account.api_key, **kwargs)
 
 	@classmethod
-	def from_credentials_file(cls, filename):
-		with open(filename) as f:
-			config = json.load(f)
-		return cls(json_endpoint_uri = config["json_endpoint"], customer = config["customer"], api_password = config["api_password"], api_key = config["api_key"])
+	def from_credentials_file(cls, filename, **kwargs):
+		accounts = NetcupAccount.read_credentials_file(filename)
+		if len(accounts) != 1:
+			raise ConfigurationSyntaxError(f"{filename} defines {len(accounts)} accounts, but a connection can only be established to exactly one of them.")
+		return cls.from_account(accounts[0], **kwargs)
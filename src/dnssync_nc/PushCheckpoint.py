@@ -0,0 +1,102 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import json
+import threading
+
+class PushCheckpoint():
+	# Append-only record of the zones a push has completed, together with
+	# the serial the server reported afterwards. Every entry is synced to
+	# disk before the next zone is recorded, so after a crash or interruption
+	# the push can be resumed without retrieving and comparing the zones that
+	# were already done. Once the push has completed, the file is removed.
+	def __init__(self, filename: str, resume: bool = False):
+		self._filename = filename
+		if os.path.dirname(filename) != "":
+			os.makedirs(os.path.dirname(filename), exist_ok = True)
+		self._lock = threading.Lock()
+		self._done = self._read(filename) if resume else { }
+		self._f = self._rewrite()
+
+	@property
+	def filename(self):
+		return self._filename
+
+	@staticmethod
+	def _read(filename: str):
+		done = { }
+		try:
+			with open(filename) as f:
+				for line in f:
+					try:
+						entry = json.loads(line)
+					except json.JSONDecodeError:
+						# The last entry was only partially written
+						break
+					done[entry["domainname"]] = (entry["content_hash"], entry["serial"])
+		except FileNotFoundError:
+			pass
+		return done
+
+	@staticmethod
+	def _serialize_entry(domainname: str, content_hash: str, serial: int | None):
+		return json.dumps({ "domainname": domainname, "content_hash": content_hash, "serial": serial }, separators = (",", ":")) + "\n"
+
+	def _rewrite(self):
+		# Starts from the entries that were read (if any) so that a partially
+		# written entry is not continued by the next one.
+		tmp_filename = f"{self._filename}.{os.getpid()}.tmp"
+		with open(tmp_filename, "w") as f:
+			for (domainname, (content_hash, serial)) in self._done.items():
+				f.write(self._serialize_entry(domainname, content_hash, serial))
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp_filename, self._filename)
+		return open(self._filename, "a")
+
+	def get(self, domainname: str):
+		with self._lock:
+			return self._done.get(domainname)
+
+	def put(self, domainname: str, content_hash: str, serial: int | None):
+		with self._lock:
+			self._done[domainname] = (content_hash, serial)
+			self._f.write(self._serialize_entry(domainname, content_hash, serial))
+			self._f.flush()
+			os.fsync(self._f.fileno())
+
+	def close(self):
+		with self._lock:
+			self._f.close()
+
+	def complete(self):
+		self.close()
+		os.unlink(self._filename)
+
+	def __len__(self):
+		return len(self._done)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
@@ -0,0 +1,69 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import sqlite3
+import threading
+
+class PushJournal():
+	# Remembers, for every zone, the content hash of what was last pushed
+	# successfully and the zone serial the server reported afterwards. This
+	# allows an incremental push to skip all zones that did not change.
+	def __init__(self, filename: str):
+		self._filename = filename
+		if os.path.dirname(filename) != "":
+			os.makedirs(os.path.dirname(filename), exist_ok = True)
+		self._lock = threading.Lock()
+		self._db = sqlite3.connect(filename, check_same_thread = False)
+		self._db.execute("""
+			CREATE TABLE IF NOT EXISTS pushed_zones (
+				domainname TEXT PRIMARY KEY,
+				content_hash TEXT NOT NULL,
+				serial INTEGER
+			);
+		""")
+		self._db.commit()
+
+	@property
+	def filename(self):
+		return self._filename
+
+	def get(self, domainname: str):
+		with self._lock:
+			row = self._db.execute("SELECT content_hash, serial FROM pushed_zones WHERE domainname = ?;", (domainname, )).fetchone()
+		if row is None:
+			return None
+		return tuple(row)
+
+	def put(self, domainname: str, content_hash: str, serial: int | None):
+		with self._lock:
+			self._db.execute("INSERT OR REPLACE INTO pushed_zones (domainname, content_hash, serial) VALUES (?, ?, ?);", (domainname, content_hash, serial))
+			self._db.commit()
+
+	def close(self):
+		with self._lock:
+			self._db.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
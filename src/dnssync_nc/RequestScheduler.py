@@ -0,0 +1,142 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import time
+import random
+import threading
+import requests
+from .JSONCodec import JSONCodec
+
+class RequestScheduler():
+	_RETRYABLE_HTTP_STATUS_CODES = frozenset([ 429, 500, 502, 503, 504 ])
+
+	# For requests which modify data, only retry when it is certain that the
+	# server did not process the request
+	_UNPROCESSED_HTTP_STATUS_CODES = frozenset([ 429, 503 ])
+
+	def __init__(self, rate_limit: float | None = None, burst: int = 1, timeout: float | None = 60, max_retries: int = 5, backoff_base: float = 0.5, backoff_max: float = 30, retry_api_status_codes: "typing.Iterable[int]" = (), json_codec: JSONCodec | None = None):
+		if (rate_limit is not None) and (rate_limit <= 0):
+			raise ValueError(f"Rate limit must be positive, but got {rate_limit}.")
+		self._rate_limit = rate_limit
+		self._burst = burst
+		self._timeout = timeout
+		self._max_retries = max_retries
+		self._backoff_base = backoff_base
+		self._backoff_max = backoff_max
+		# API status codes are only known after decoding the response, which
+		# is therefore only done if any of them are to be retried.
+		self._retry_api_status_codes = frozenset(retry_api_status_codes)
+		self._json_codec = json_codec if (json_codec is not None) else JSONCodec()
+		self._lock = threading.Lock()
+		self._tokens = burst
+		self._last_refill = time.monotonic()
+		self._requests = 0
+		self._retries = 0
+		self._throttled = 0
+		self._throttle_time = 0
+		self._server_throttled = 0
+
+	@property
+	def timeout(self):
+		return self._timeout
+
+	@property
+	def statistics(self):
+		with self._lock:
+			return {
+				"requests":			self._requests,
+				"retries":			self._retries,
+				"throttled":		self._throttled,
+				"throttle_time":	self._throttle_time,
+				"server_throttled":	self._server_throttled,
+			}
+
+	def _acquire_token(self):
+		if self._rate_limit is None:
+			return
+		with self._lock:
+			now = time.monotonic()
+			self._tokens = min(self._burst, self._tokens + (now - self._last_refill) * self._rate_limit)
+			self._last_refill = now
+
+			# Reserve the token right away (possibly going negative) so that
+			# concurrent callers queue up behind each other
+			self._tokens -= 1
+			delay = 0 if (self._tokens >= 0) else (-self._tokens / self._rate_limit)
+			if delay > 0:
+				self._throttled += 1
+				self._throttle_time += delay
+		if delay > 0:
+			time.sleep(delay)
+
+	def _backoff_delay(self, attempt: int, response: "requests.Response | None"):
+		if (response is not None) and ("Retry-After" in response.headers):
+			try:
+				return min(self._backoff_max, float(response.headers["Retry-After"]))
+			except ValueError:
+				pass
+		# Exponential backoff with full jitter
+		return random.uniform(0, min(self._backoff_max, self._backoff_base * (2 ** attempt)))
+
+	def _retryable_response(self, response: "requests.Response", idempotent: bool):
+		if response.status_code in (self._RETRYABLE_HTTP_STATUS_CODES if idempotent else self._UNPROCESSED_HTTP_STATUS_CODES):
+			return True
+		if (response.status_code == 200) and (len(self._retry_api_status_codes) > 0):
+			try:
+				return self._json_codec.decode(response.content).get("statuscode") in self._retry_api_status_codes
+			except ValueError:
+				return False
+		return False
+
+	def _retryable_exception(self, exception: Exception, idempotent: bool):
+		if idempotent:
+			return isinstance(exception, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+		else:
+			return isinstance(exception, requests.exceptions.ConnectTimeout)
+
+	def execute(self, request_fnc: "typing.Callable[[], requests.Response]", idempotent: bool = True):
+		attempt = 0
+		while True:
+			self._acquire_token()
+			with self._lock:
+				self._requests += 1
+			try:
+				response = request_fnc()
+			except Exception as e:
+				if (attempt >= self._max_retries) or (not self._retryable_exception(e, idempotent)):
+					raise
+				response = None
+			else:
+				if response.status_code == 429:
+					with self._lock:
+						self._server_throttled += 1
+				if (attempt >= self._max_retries) or (not self._retryable_response(response, idempotent)):
+					return response
+
+			delay = self._backoff_delay(attempt, response)
+			with self._lock:
+				self._retries += 1
+			time.sleep(delay)
+			attempt += 1
+
+	def __str__(self):
+		statistics = self.statistics
+		return f"API requests: {statistics['requests']}, {statistics['retries']} retries, {statistics['throttled']} throttled locally ({statistics['throttle_time']:.1f} sec), {statistics['server_throttled']} throttled by server"
@@ -0,0 +1,87 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import json
+import fcntl
+import threading
+import contextlib
+
+class SessionStore():
+	# Keeps API session IDs between invocations, keyed by customer number.
+	# Since a session ID grants API access, the file is only ever readable by
+	# its owner.
+	def __init__(self, filename: str):
+		self._filename = filename
+		self._lock = threading.Lock()
+
+	@property
+	def filename(self):
+		return self._filename
+
+	@contextlib.contextmanager
+	def _locked(self):
+		# Several processes (e.g., when syncing multiple accounts in parallel)
+		# may update the file concurrently, serialize the read-modify-write
+		# cycles using an advisory lock on a separate lock file.
+		with self._lock:
+			if os.path.dirname(self._filename) != "":
+				os.makedirs(os.path.dirname(self._filename), mode = 0o700, exist_ok = True)
+			fd = os.open(f"{self._filename}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+			try:
+				fcntl.flock(fd, fcntl.LOCK_EX)
+				yield
+			finally:
+				os.close(fd)
+
+	def _load(self):
+		try:
+			with open(self._filename) as f:
+				return json.load(f)
+		except (FileNotFoundError, json.decoder.JSONDecodeError):
+			return { }
+
+	def _save(self, sessions: dict):
+		if os.path.dirname(self._filename) != "":
+			os.makedirs(os.path.dirname(self._filename), mode = 0o700, exist_ok = True)
+		tmp_filename = f"{self._filename}.{os.getpid()}.tmp"
+		fd = os.open(tmp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+		with os.fdopen(fd, "w") as f:
+			os.fchmod(f.fileno(), 0o600)
+			json.dump(sessions, f)
+		os.replace(tmp_filename, self._filename)
+
+	def get(self, customer: str | int):
+		with self._locked():
+			return self._load().get(str(customer))
+
+	def put(self, customer: str | int, session_id: str):
+		with self._locked():
+			sessions = self._load()
+			sessions[str(customer)] = session_id
+			self._save(sessions)
+
+	def remove(self, customer: str | int):
+		with self._locked():
+			sessions = self._load()
+			if str(customer) in sessions:
+				del sessions[str(customer)]
+				self._save(sessions)
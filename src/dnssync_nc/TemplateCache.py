@@ -0,0 +1,105 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import stat
+import hashlib
+import threading
+import mako.lookup
+
+class TemplateCache():
+	# Compiled templates are stored under a name derived from the absolute
+	# template filename and its content. Any change to a template (or to an
+	# included template, which is compiled separately) therefore results in
+	# a different module file, regardless of file timestamps or which of the
+	# include directories the template was found in. When a template is
+	# recompiled, the modules of its previous content are removed.
+	def __init__(self, module_directory: str):
+		self._module_directory = module_directory
+		self._lock = threading.Lock()
+		self._hits = 0
+		self._misses = 0
+
+	@property
+	def module_directory(self):
+		return self._module_directory
+
+	@property
+	def hits(self):
+		return self._hits
+
+	@property
+	def misses(self):
+		return self._misses
+
+	@property
+	def hit_rate(self):
+		total = self._hits + self._misses
+		return (self._hits / total) if (total > 0) else None
+
+	def add_statistics(self, hits: int, misses: int):
+		# Accounts for lookups that happened in another process
+		with self._lock:
+			self._hits += hits
+			self._misses += misses
+
+	def module_filename(self, filename: str, uri: str):
+		filename = os.path.abspath(filename)
+		with open(filename, "rb") as f:
+			content = f.read()
+		path_digest = hashlib.sha256(filename.encode()).hexdigest()[:32]
+		content_digest = hashlib.sha256(filename.encode() + b"\x00" + content).hexdigest()[:32]
+		module_filename = os.path.join(self._module_directory, f"{path_digest}_{content_digest}.py")
+
+		try:
+			# Mako recompiles if the module is older than the template
+			hit = os.stat(module_filename)[stat.ST_MTIME] >= os.stat(filename)[stat.ST_MTIME]
+		except FileNotFoundError:
+			hit = False
+		with self._lock:
+			if hit:
+				self._hits += 1
+			else:
+				self._misses += 1
+		if not hit:
+			self._remove_stale_modules(path_digest, module_filename)
+		return module_filename
+
+	def _remove_stale_modules(self, path_digest: str, module_filename: str):
+		try:
+			filenames = os.listdir(self._module_directory)
+		except FileNotFoundError:
+			return
+		for filename in filenames:
+			if filename.startswith(f"{path_digest}_") and (filename != os.path.basename(module_filename)):
+				try:
+					os.unlink(os.path.join(self._module_directory, filename))
+				except FileNotFoundError:
+					# Concurrently removed by another process
+					pass
+
+	def create_lookup(self, directories: list[str], lookup_class: type = mako.lookup.TemplateLookup, **kwargs):
+		return lookup_class(directories, module_directory = self._module_directory, modulename_callable = self.module_filename, **kwargs)
+
+	def __str__(self):
+		hit_rate = self.hit_rate
+		hit_rate_str = "n/a" if (hit_rate is None) else f"{100 * hit_rate:.1f}%"
+		return f"Template cache {self._module_directory}: {self._hits} hits, {self._misses} misses, hit rate {hit_rate_str}"
@@ -0,0 +1,169 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import json
+import time
+import threading
+import contextlib
+
+class Timings():
+	# Wall time per phase and latency histogram plus payload sizes per API
+	# action. Phases which run in worker threads (fetch, diff, commit) are
+	# summed over all threads and can therefore exceed the total run time.
+	_LATENCY_BUCKETS = [ 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30 ]
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._phases = { }
+		self._api = { }
+
+	@contextlib.contextmanager
+	def phase(self, name: str):
+		t0 = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.record_phase(name, time.perf_counter() - t0)
+
+	def record_phase(self, name: str, duration: float, count: int = 1):
+		with self._lock:
+			phase = self._phases.setdefault(name, { "count": 0, "total_secs": 0 })
+			phase["count"] += count
+			phase["total_secs"] += duration
+
+	def _api_entry(self, action_name: str):
+		return self._api.setdefault(action_name, { "count": 0, "total_secs": 0, "request_bytes": 0, "response_bytes": 0, "buckets": [ 0 ] * (len(self._LATENCY_BUCKETS) + 1) })
+
+	def record_request(self, action_name: str, duration: float, request_bytes: int, response_bytes: int):
+		bucket_index = len(self._LATENCY_BUCKETS)
+		for (index, upper_bound) in enumerate(self._LATENCY_BUCKETS):
+			if duration <= upper_bound:
+				bucket_index = index
+				break
+		with self._lock:
+			entry = self._api_entry(action_name)
+			entry["count"] += 1
+			entry["total_secs"] += duration
+			entry["request_bytes"] += request_bytes
+			entry["response_bytes"] += response_bytes
+			entry["buckets"][bucket_index] += 1
+
+	def merge(self, other: "Timings"):
+		other_data = other.serialize()
+		with self._lock:
+			for (name, phase) in other_data["phases"].items():
+				own_phase = self._phases.setdefault(name, { "count": 0, "total_secs": 0 })
+				own_phase["count"] += phase["count"]
+				own_phase["total_secs"] += phase["total_secs"]
+			for (action_name, api_data) in other_data["api"].items():
+				entry = self._api_entry(action_name)
+				for key in [ "count", "total_secs", "request_bytes", "response_bytes" ]:
+					entry[key] += api_data[key]
+				for (index, bucket_count) in enumerate(api_data["buckets"].values()):
+					entry["buckets"][index] += bucket_count
+
+	def serialize(self):
+		with self._lock:
+			return {
+				"phases": { name: dict(phase) for (name, phase) in self._phases.items() },
+				"api": {
+					action_name: {
+						"count":			entry["count"],
+						"total_secs":		entry["total_secs"],
+						"request_bytes":	entry["request_bytes"],
+						"response_bytes":	entry["response_bytes"],
+						# Not cumulative, unlike Prometheus buckets
+						"buckets":			dict(zip([ str(upper_bound) for upper_bound in self._LATENCY_BUCKETS ] + [ "+Inf" ], entry["buckets"])),
+					} for (action_name, entry) in self._api.items()
+				},
+			}
+
+	@classmethod
+	def deserialize(cls, data: dict):
+		timings = cls()
+		for (name, phase) in data["phases"].items():
+			timings.record_phase(name, phase["total_secs"], count = phase["count"])
+		for (action_name, api_data) in data["api"].items():
+			entry = timings._api_entry(action_name)
+			for key in [ "count", "total_secs", "request_bytes", "response_bytes" ]:
+				entry[key] = api_data[key]
+			entry["buckets"] = list(api_data["buckets"].values())
+		return timings
+
+	@staticmethod
+	def _escape_label(value: str):
+		return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+	def prometheus_text(self, timestamp: float | None = None):
+		data = self.serialize()
+		lines = [ ]
+		lines.append("# HELP dnssync_nc_last_run_timestamp_seconds Time at which the timings were recorded.")
+		lines.append("# TYPE dnssync_nc_last_run_timestamp_seconds gauge")
+		lines.append(f"dnssync_nc_last_run_timestamp_seconds {time.time() if (timestamp is None) else timestamp:.3f}")
+		lines.append("# HELP dnssync_nc_phase_duration_seconds Time spent per phase, summed over all worker threads.")
+		lines.append("# TYPE dnssync_nc_phase_duration_seconds gauge")
+		for (name, phase) in data["phases"].items():
+			lines.append(f"dnssync_nc_phase_duration_seconds{{phase=\"{self._escape_label(name)}\"}} {phase['total_secs']:.6f}")
+		lines.append("# HELP dnssync_nc_phase_runs Number of times a phase was run.")
+		lines.append("# TYPE dnssync_nc_phase_runs gauge")
+		for (name, phase) in data["phases"].items():
+			lines.append(f"dnssync_nc_phase_runs{{phase=\"{self._escape_label(name)}\"}} {phase['count']}")
+		lines.append("# HELP dnssync_nc_api_request_duration_seconds Latency of API requests including retries.")
+		lines.append("# TYPE dnssync_nc_api_request_duration_seconds histogram")
+		for (action_name, api_data) in data["api"].items():
+			label = f"action=\"{self._escape_label(action_name)}\""
+			cumulative_count = 0
+			for (upper_bound, bucket_count) in api_data["buckets"].items():
+				cumulative_count += bucket_count
+				lines.append(f"dnssync_nc_api_request_duration_seconds_bucket{{{label},le=\"{upper_bound}\"}} {cumulative_count}")
+			lines.append(f"dnssync_nc_api_request_duration_seconds_sum{{{label}}} {api_data['total_secs']:.6f}")
+			lines.append(f"dnssync_nc_api_request_duration_seconds_count{{{label}}} {api_data['count']}")
+		for (key, description) in [ ("request_bytes", "Payload bytes sent to the API (before compression)."), ("response_bytes", "Payload bytes received from the API (after decompression).") ]:
+			lines.append(f"# HELP dnssync_nc_api_{key} {description}")
+			lines.append(f"# TYPE dnssync_nc_api_{key} gauge")
+			for (action_name, api_data) in data["api"].items():
+				lines.append(f"dnssync_nc_api_{key}{{action=\"{self._escape_label(action_name)}\"}} {api_data[key]}")
+		return "\n".join(lines) + "\n"
+
+	@staticmethod
+	def _write_atomically(filename: str, content: str):
+		# The Prometheus textfile collector must never see partially written
+		# files
+		tmp_filename = f"{filename}.{os.getpid()}.tmp"
+		with open(tmp_filename, "w") as f:
+			f.write(content)
+		os.replace(tmp_filename, filename)
+
+	def write_json(self, filename: str):
+		self._write_atomically(filename, json.dumps(self.serialize(), indent = 4) + "\n")
+
+	def write_prometheus(self, filename: str):
+		self._write_atomically(filename, self.prometheus_text())
+
+	def __str__(self):
+		data = self.serialize()
+		lines = [ "Timings:" ]
+		for (name, phase) in data["phases"].items():
+			lines.append(f"    {name:<16s} {phase['total_secs']:8.3f} sec ({phase['count']}x)")
+		for (action_name, api_data) in data["api"].items():
+			lines.append(f"    {action_name:<16s} {api_data['count']:6d} requests, avg {api_data['total_secs'] / api_data['count'] * 1000:7.1f} ms, {api_data['request_bytes']} bytes sent, {api_data['response_bytes']} bytes received")
+		return "\n".join(lines)
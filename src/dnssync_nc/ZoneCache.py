@@ -0,0 +1,85 @@
+#	dnssync_nc - DNS API interface for the ISP netcup
+#	Copyright (C) 2020-2026 Johannes Bauer
+#
+#	This file is part of dnssync_nc.
+#
+#	dnssync_nc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	dnssync_nc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with dnssync_nc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import json
+import sqlite3
+import threading
+from .DNSRecords import DNSRecord
+
+class ZoneCache():
+	# Records of a zone are cached together with the zone serial they belong
+	# to; as long as infoDnsZone reports the same serial, the cached records
+	# are used instead of calling infoDnsRecords again.
+	def __init__(self, filename: str, refresh: bool = False):
+		self._filename = filename
+		self._refresh = refresh
+		if os.path.dirname(filename) != "":
+			os.makedirs(os.path.dirname(filename), exist_ok = True)
+		self._lock = threading.Lock()
+		self._db = sqlite3.connect(filename, check_same_thread = False)
+		self._db.execute("""
+			CREATE TABLE IF NOT EXISTS zones (
+				domainname TEXT PRIMARY KEY,
+				serial INTEGER NOT NULL,
+				records TEXT NOT NULL
+			);
+		""")
+		self._db.commit()
+
+	@property
+	def filename(self):
+		return self._filename
+
+	def get(self, domainname: str, serial: int):
+		if self._refresh:
+			return None
+		with self._lock:
+			row = self._db.execute("SELECT records FROM zones WHERE (domainname = ?) AND (serial = ?);", (domainname, serial)).fetchone()
+		if row is None:
+			return None
+		return DNSRecord.deserialize_many(json.loads(row[0]))
+
+	def get_serial(self, domainname: str):
+		with self._lock:
+			row = self._db.execute("SELECT serial FROM zones WHERE domainname = ?;", (domainname, )).fetchone()
+		return None if (row is None) else row[0]
+
+	def put(self, domainname: str, serial: int, records: list[DNSRecord]):
+		serialized_records = json.dumps([ record.serialize() for record in records ])
+		with self._lock:
+			self._db.execute("INSERT OR REPLACE INTO zones (domainname, serial, records) VALUES (?, ?, ?);", (domainname, serial, serialized_records))
+			self._db.commit()
+
+	def invalidate(self, domainname: str):
+		with self._lock:
+			self._db.execute("DELETE FROM zones WHERE domainname = ?;", (domainname, ))
+			self._db.commit()
+
+	def close(self):
+		with self._lock:
+			self._db.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
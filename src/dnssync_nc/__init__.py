@@ -20,8 +20,24 @@
 #	Johannes Bauer <JohannesBauer@gmx.de>
 
 from .DNSRecords import DNSZone, DNSRecord, DNSZoneParser, DNSZoneLayout
+from .BINDZoneFile import BINDZoneReader, BINDZoneWriter
+from .DNSZoneDiff import DNSZoneDiff
+from .LayoutLinter import LayoutLinter, LintIssue, LintSeverity
+from .ChangePlan import ChangePlan
+from .ZoneCache import ZoneCache
+from .SessionStore import SessionStore
+from .PushJournal import PushJournal
+from .PushCheckpoint import PushCheckpoint
+from .RequestScheduler import RequestScheduler
+from .JSONCodec import JSONCodec
+from .Timings import Timings
+from .NetcupAccount import NetcupAccount
 from .NetcupConnection import NetcupConnection
-from .Exceptions import DNSSyncError
+from .Exceptions import DNSSyncError, PartialUpdateError, StalePlanError, LayoutRenderError
 from .EntryHelper import EntryHelper
+from .TemplateCache import TemplateCache
+from .DependencyTrackingLookup import DependencyTrackingLookup
+from .LayoutRenderer import LayoutRenderer, DomainFilter
+from .FileWatcher import FileWatcher, PollingFileWatcher, InotifyFileWatcher
 
 VERSION = "1.0.5rc0"
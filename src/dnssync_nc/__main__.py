@@ -22,79 +22,515 @@
 
 import os
 import sys
-import mako.lookup
+import signal
+import argparse
+import tempfile
+import contextlib
+import concurrent.futures
 import dnssync_nc
 from .FriendlyArgumentParser import FriendlyArgumentParser
 
+def _timings_enabled(args):
+	return args.timings or (args.timings_json is not None) or (args.timings_prometheus is not None)
+
+def _report_timings(args, timings: dnssync_nc.Timings):
+	if args.timings:
+		print(timings, file = sys.stderr)
+	if args.timings_json is not None:
+		timings.write_json(args.timings_json)
+	if args.timings_prometheus is not None:
+		timings.write_prometheus(args.timings_prometheus)
+
 class NetcupCLI():
-	def __init__(self, args):
+	def __init__(self, args, account: dnssync_nc.NetcupAccount | None = None, report_timings: bool = True):
 		self._args = args
-		self._lookup = mako.lookup.TemplateLookup([ "." ] + self._args.include_dir, strict_undefined = True)
+		self._account = account
+		self._timings = dnssync_nc.Timings() if _timings_enabled(args) else None
+		self._report_timings = report_timings
+		if self._args.no_template_cache:
+			self._template_cache = None
+		else:
+			self._template_cache = dnssync_nc.TemplateCache(os.path.expanduser(self._args.template_cache))
+		self._renderer = dnssync_nc.LayoutRenderer(self._args.include_dir, template_cache = self._template_cache, timings = self._timings)
+		self._scheduler = None
 
-	def _login(self):
-		return dnssync_nc.NetcupConnection.from_credentials_file(os.path.expanduser(self._args.credentials))
+	@property
+	def timings(self):
+		return self._timings
 
-	def _render_layout_file(self, layout_filename: str):
-		# Render the layout filename as a Mako template first
-		template = self._lookup.get_template(layout_filename)
-		template_vars = {
-			"entry": dnssync_nc.EntryHelper(),
-		}
-		rendered = template.render(**template_vars)
-		return rendered
+	def _phase(self, name: str):
+		if self._timings is None:
+			return contextlib.nullcontext()
+		return self._timings.phase(name)
 
-	def _parse_layout_file(self, layout_filename: str):
-		rendered = self._render_layout_file(layout_filename)
+	def _login(self, push_checkpoint: dnssync_nc.PushCheckpoint | None = None):
+		if self._args.no_cache:
+			zone_cache = None
+		else:
+			zone_cache = dnssync_nc.ZoneCache(os.path.expanduser(self._args.cache_file), refresh = self._args.refresh_cache)
+		if self._args.persist_session:
+			session_store = dnssync_nc.SessionStore(os.path.expanduser(self._args.session_file))
+		else:
+			session_store = None
+		push_journal = dnssync_nc.PushJournal(os.path.expanduser(self._args.journal_file))
+		json_codec = dnssync_nc.JSONCodec(self._args.json_backend)
+		self._scheduler = dnssync_nc.RequestScheduler(rate_limit = self._args.rate_limit, burst = max(1, self._args.jobs), timeout = self._args.timeout, max_retries = self._args.retries, retry_api_status_codes = self._args.retry_api_status_code, json_codec = json_codec)
+		return dnssync_nc.NetcupConnection.from_account(self._account, jobs = self._args.jobs, commit_jobs = self._args.commit_jobs, zone_cache = zone_cache, session_store = session_store, push_journal = push_journal, push_checkpoint = push_checkpoint, scheduler = self._scheduler, chunk_size = self._args.chunk_size, chunk_jobs = self._args.chunk_jobs, json_codec = json_codec, compress_requests = self._args.compress_requests, timings = self._timings)
+
+	def _write_rendered_output(self, rendered: str):
 		if self._args.rendered_output is not None:
 			with open(self._args.rendered_output, "w") as f:
 				f.write(rendered)
-		parser = dnssync_nc.DNSZoneParser()
-		layout = parser.parse(rendered)
-		return layout
+
+	@property
+	def _domain_filter(self):
+		return self._args.domain_name if (len(self._args.domain_name) != 0) else None
+
+	def _parse_layout_file(self, layout_filename: str):
+		rendered = self._renderer.render(layout_filename, self._domain_filter)
+		self._write_rendered_output(rendered)
+		return self._renderer.parse(rendered, self._domain_filter)
+
+	def _layouts(self):
+		# Layouts are rendered and parsed in parallel, but returned in order
+		# so that a failure surfaces at the same point as when they were
+		# processed one after another.
+		for (layout_filename, rendered, layout, error) in self._renderer.render_all(self._args.domain_data, jobs = self._args.render_jobs, keep_rendered = self._args.rendered_output is not None, domainnames = self._domain_filter):
+			if rendered is not None:
+				self._write_rendered_output(rendered)
+			if error is not None:
+				raise error
+			yield layout
+
+	def _lint(self, layouts: list[dnssync_nc.DNSZoneLayout], f: "io.TextIOWrapper | None" = None):
+		# Returns True if none of the layouts contains any errors.
+		linter = dnssync_nc.LayoutLinter()
+		error_count = 0
+		with self._phase("lint"):
+			for layout in layouts:
+				for issue in linter.lint(layout):
+					print(issue, file = f)
+					if issue.severity == dnssync_nc.LintSeverity.ERROR:
+						error_count += 1
+		if error_count > 0:
+			print(f"Layout contains {error_count} error(s).", file = sys.stderr)
+		return error_count == 0
+
+	def _preflight_layouts(self):
+		# All layouts are checked before anything is pushed, so they need to
+		# be kept. Returns None if the lint failed.
+		if self._args.no_lint:
+			return self._layouts()
+		layouts = list(self._layouts())
+		if not self._lint(layouts, f = sys.stderr):
+			print("Refusing to continue, fix the layout or use --no-lint.", file = sys.stderr)
+			return None
+		return layouts
+
+	def _open_push_checkpoint(self):
+		if not self._args.commit:
+			return None
+		filename = os.path.expanduser(self._args.checkpoint_file.format(customer = self._account.customer))
+		push_checkpoint = dnssync_nc.PushCheckpoint(filename, resume = self._args.resume)
+		if self._args.resume and (self._args.verbose >= 1):
+			print(f"Resuming push, {len(push_checkpoint)} zone(s) were already completed according to {filename}", file = sys.stderr)
+		return push_checkpoint
 
 	def _run_push(self):
+		if (layouts := self._preflight_layouts()) is None:
+			return 1
+		push_checkpoint = self._open_push_checkpoint()
+		with self._login(push_checkpoint = push_checkpoint) as ncc:
+			for layout in layouts:
+				ncc.push_dns_zone_layout(layout, show_diff = True, commit = self._args.commit, incremental = self._args.incremental)
+		if push_checkpoint is not None:
+			# Only an interrupted push can be resumed
+			push_checkpoint.complete()
+
+	def _watch_update(self, ncc: dnssync_nc.NetcupConnection, layout_filenames: list[str], states: dict):
+		# Re-renders the given layouts and pushes only those zones whose
+		# content differs from what was last pushed from them.
+		for layout_filename in layout_filenames:
+			state = states.setdefault(layout_filename, { "dependencies": { os.path.realpath(layout_filename) }, "zone_hashes": { }, "failed": True })
+			try:
+				with self._renderer.lookup.record_dependencies() as dependencies:
+					layout = self._parse_layout_file(layout_filename)
+			except Exception as e:
+				print(f"{layout_filename}: {e.__class__.__name__}: {str(e)}", file = sys.stderr)
+				state["failed"] = True
+				continue
+			state["dependencies"] = dependencies | { os.path.realpath(layout_filename) }
+			if (not self._args.no_lint) and (not self._lint([ layout ], f = sys.stderr)):
+				print(f"{layout_filename}: not pushing, layout contains errors", file = sys.stderr)
+				state["failed"] = True
+				continue
+
+			zone_hashes = { domainname: layout[domainname].content_hash() for domainname in layout.domainnames }
+			changed_domainnames = [ domainname for domainname in layout.domainnames if zone_hashes[domainname] != state["zone_hashes"].get(domainname) ]
+			if len(changed_domainnames) > 0:
+				try:
+					ncc.push_dns_zone_layout(layout.filter_domainnames(changed_domainnames), show_diff = True, commit = self._args.commit, incremental = self._args.incremental)
+				except Exception as e:
+					# Keep the previous state so the zones are pushed again
+					# on the next change
+					print(f"{layout_filename}: pushing failed: {e.__class__.__name__}: {str(e)}", file = sys.stderr)
+					state["failed"] = True
+					continue
+				sys.stdout.flush()
+				if self._args.verbose >= 1:
+					print(f"{layout_filename}: {'pushed' if self._args.commit else 'compared'} {len(changed_domainnames)} changed zone(s)", file = sys.stderr)
+			state["zone_hashes"] = zone_hashes
+			state["failed"] = False
+
+	def _watch_directories(self, states: dict):
+		directories = set([ "." ] + self._args.include_dir)
+		for state in states.values():
+			directories |= set(os.path.dirname(filename) for filename in state["dependencies"])
+		return directories
+
+	def _run_watch(self):
+		# Terminate gracefully (i.e., log out) when stopped by a service
+		# manager
+		signal.signal(signal.SIGTERM, signal.default_int_handler)
+		states = { }
+		with self._login() as ncc, dnssync_nc.FileWatcher.create(polling = self._args.watch_poll, interval = self._args.watch_interval) as watcher:
+			self._watch_update(ncc, self._args.domain_data, states)
+			watcher.watch(self._watch_directories(states))
+			if self._args.verbose >= 1:
+				print(f"Watching {len(watcher.directories)} directories using {watcher.__class__.__name__}", file = sys.stderr)
+			try:
+				while True:
+					changed_filenames = watcher.wait_for_changes()
+					if changed_filenames is None:
+						affected = list(self._args.domain_data)
+					else:
+						affected = [ layout_filename for layout_filename in self._args.domain_data if states[layout_filename]["failed"] or (len(states[layout_filename]["dependencies"] & changed_filenames) > 0) ]
+					if len(affected) > 0:
+						self._watch_update(ncc, affected, states)
+						watcher.watch(self._watch_directories(states))
+			except KeyboardInterrupt:
+				pass
+
+	def _run_plan(self):
+		if (layouts := self._preflight_layouts()) is None:
+			return 1
+		diffs = [ ]
 		with self._login() as ncc:
-			for layout_filename in self._args.domain_data:
-				layout = self._parse_layout_file(layout_filename)
-				if len(self._args.domain_name) != 0:
-					layout = layout.filter_domainnames(self._args.domain_name)
-				ncc.push_dns_zone_layout(layout, show_diff = True, commit = self._args.commit)
+			for layout in layouts:
+				diffs += [ diff for diff in ncc.push_dns_zone_layout(layout, show_diff = True, commit = False, incremental = self._args.incremental) if diff.changed ]
+		dnssync_nc.ChangePlan(diffs).write(self._args.plan_file)
+		print(f"Wrote plan with changes to {len(diffs)} zone(s) to {self._args.plan_file}", file = sys.stderr)
 
-	def _run_pull(self):
+	def _run_apply(self):
+		plan = dnssync_nc.ChangePlan.read(self._args.plan_file)
+		with self._login() as ncc:
+			try:
+				ncc.apply_dns_zone_diffs(plan.diffs, show_diff = True)
+			except dnssync_nc.StalePlanError as e:
+				print(str(e), file = sys.stderr)
+				return 1
+
+	def _run_ddns(self):
+		updates = [ tuple(update.split(",")) for update in self._args.domain_data ]
 		with self._login() as ncc:
-			layout = ncc.get_dns_zone_layout(self._args.domain_data)
+			ncc.update_dynamic_records(updates, show_diff = True, commit = self._args.commit)
+
+	def _print_layout(self, layout: dnssync_nc.DNSZoneLayout):
+		if self._args.output_format == "bind":
+			dnssync_nc.BINDZoneWriter(sys.stdout).write_layout(layout, sort_records = self._args.sort_records)
+		else:
 			layout.print(sort_records = self._args.sort_records)
 
+	def _zone_writer(self, f: "io.TextIOWrapper"):
+		if self._args.output_format == "bind":
+			writer = dnssync_nc.BINDZoneWriter(f)
+			return lambda dns_zone: writer.write_zone(dns_zone, sort_records = self._args.sort_records)
+		else:
+			def write_zone(dns_zone: dnssync_nc.DNSZone):
+				dns_zone.print(f = f, sort_records = self._args.sort_records)
+				print(file = f)
+			return write_zone
+
+	def _write_zone_file(self, dns_zone: dnssync_nc.DNSZone):
+		suffix = ".zone" if (self._args.output_format == "bind") else ".txt"
+		filename = os.path.join(self._args.output_dir, f"{dns_zone.domainname}{suffix}")
+		tmp_filename = f"{filename}.{os.getpid()}.tmp"
+		with open(tmp_filename, "w") as f:
+			self._zone_writer(f)(dns_zone)
+		os.replace(tmp_filename, filename)
+		if self._args.verbose >= 1:
+			print(f"Wrote {dns_zone.domainname} to {filename}", file = sys.stderr)
+
+	def _run_pull(self):
+		# Every zone is written as soon as it has been retrieved and is not
+		# kept afterwards.
+		if self._args.output_dir is not None:
+			os.makedirs(self._args.output_dir, exist_ok = True)
+			write_zone = self._write_zone_file
+		else:
+			write_zone = self._zone_writer(sys.stdout)
+		with self._login() as ncc:
+			for dns_zone in ncc.iter_dns_zones(self._args.domain_data):
+				write_zone(dns_zone)
+
+	def _run_lint(self):
+		if not self._lint(self._layouts()):
+			return 1
+
 	def _run_print(self):
-		for layout_filename in self._args.domain_data:
-			layout = self._parse_layout_file(layout_filename)
-			if len(self._args.domain_name) != 0:
-				layout = layout.filter_domainnames(self._args.domain_name)
-			layout.print(sort_records = self._args.sort_records)
+		for layout in self._layouts():
+			self._print_layout(layout)
+
+	def _run_import(self):
+		# Records are converted one at a time, zone files are never kept in
+		# memory as a whole.
+		reader = dnssync_nc.BINDZoneReader(origin = self._args.origin, ignore_unsupported = self._args.ignore_unsupported)
+		writer = dnssync_nc.BINDZoneWriter(sys.stdout) if (self._args.output_format == "bind") else None
+		zone_count = 0
+		for zone_filename in self._args.domain_data:
+			for item in reader.read_file(zone_filename):
+				if isinstance(item, dnssync_nc.DNSZone):
+					if writer is not None:
+						writer.begin_zone(item)
+					else:
+						if zone_count > 0:
+							print()
+						item.print_header()
+					zone_count += 1
+				elif writer is not None:
+					writer.write_record(item)
+				else:
+					print(f"	{item}")
+		if (len(reader.skipped_records) > 0) and (self._args.verbose >= 1):
+			print(f"Skipped unsupported records: {', '.join(f'{count} {record_type}' for (record_type, count) in sorted(reader.skipped_records.items()))}", file = sys.stderr)
 
 	def run(self):
 		handler = getattr(self, f"_run_{self._args.action}")
-		return handler()
+		with self._phase("total"):
+			result = handler()
+		if self._args.verbose >= 1:
+			if self._template_cache is not None:
+				print(self._template_cache, file = sys.stderr)
+			if self._scheduler is not None:
+				print(self._scheduler, file = sys.stderr)
+		if (self._timings is not None) and self._report_timings:
+			_report_timings(self._args, self._timings)
+		return result
+
+def _capture_output(fnc):
+	# Runs in a worker process: capture everything written to stdout and
+	# stderr on file descriptor level, so that it can be reported in order
+	# by the parent process.
+	sys.stdout.flush()
+	sys.stderr.flush()
+	saved_fds = (os.dup(1), os.dup(2))
+	with tempfile.TemporaryFile("w+") as stdout_file, tempfile.TemporaryFile("w+") as stderr_file:
+		try:
+			os.dup2(stdout_file.fileno(), 1)
+			os.dup2(stderr_file.fileno(), 2)
+			try:
+				result = fnc()
+			finally:
+				sys.stdout.flush()
+				sys.stderr.flush()
+		finally:
+			os.dup2(saved_fds[0], 1)
+			os.dup2(saved_fds[1], 2)
+			os.close(saved_fds[0])
+			os.close(saved_fds[1])
+		stdout_file.seek(0)
+		stderr_file.seek(0)
+		return (result, stdout_file.read(), stderr_file.read())
 
-def main():
+def _sync_account(args, account: dnssync_nc.NetcupAccount):
+	cli = NetcupCLI(args, account, report_timings = False)
+	def run():
+		try:
+			return (cli.run() or 0, None)
+		except Exception as e:
+			return (1, f"{e.__class__.__name__}: {str(e)}")
+	((returncode, error), stdout, stderr) = _capture_output(run)
+	return {
+		"returncode":	returncode,
+		"error":		error,
+		"stdout":		stdout,
+		"stderr":		stderr,
+		"timings":		None if (cli.timings is None) else cli.timings.serialize(),
+	}
+
+class MultiAccountSync():
+	# Synchronizes several accounts in parallel worker processes, each with
+	# its own API session, and combines their output into one report in the
+	# order in which the accounts were defined.
+	def __init__(self, args, account_jobs: list[tuple[dnssync_nc.NetcupAccount, list[str]]]):
+		self._args = args
+		self._account_jobs = account_jobs
+
+	def _account_args(self, domain_data: list[str]):
+		args = argparse.Namespace(**vars(self._args))
+		args.domain_data = domain_data
+		return args
+
+	def run(self):
+		failed = [ ]
+		timings = dnssync_nc.Timings() if _timings_enabled(self._args) else None
+		# The header needs to be a comment in the format that is written
+		comment_prefix = ";" if (self._args.output_format == "bind") else "#"
+		with concurrent.futures.ProcessPoolExecutor(max_workers = min(self._args.account_jobs, len(self._account_jobs))) as executor:
+			futures = [ executor.submit(_sync_account, self._account_args(domain_data), account) for (account, domain_data) in self._account_jobs ]
+			for ((account, _), future) in zip(self._account_jobs, futures):
+				result = future.result()
+				print(f"{comment_prefix} Account: {account.display_name}")
+				sys.stdout.write(result["stdout"])
+				sys.stdout.flush()
+				sys.stderr.write(result["stderr"])
+				if result["error"] is not None:
+					print(f"{account.display_name}: {result['error']}", file = sys.stderr)
+				if result["returncode"] != 0:
+					failed.append(account.display_name)
+				if result["timings"] is not None:
+					timings.merge(dnssync_nc.Timings.deserialize(result["timings"]))
+				sys.stderr.flush()
+		if timings is not None:
+			_report_timings(self._args, timings)
+		if len(failed) == 0:
+			print(f"All {len(self._account_jobs)} accounts synchronized successfully.", file = sys.stderr)
+			return 0
+		else:
+			print(f"{len(failed)} of {len(self._account_jobs)} accounts failed: {', '.join(failed)}", file = sys.stderr)
+			return 1
+
+def main(argv: list[str] | None = None):
 	parser = FriendlyArgumentParser(description = "Update DNS records using the netcup DNS API.", epilog = f"dnssync_nc version {dnssync_nc.VERSION}")
 	parser.add_argument("--rendered-output", metavar = "filename", help = "Write the Mako-rendered output to a file. Can be useful to debug errors.")
-	parser.add_argument("-a", "--action", choices = [ "print", "push", "pull" ], default = "print", help = "Defines the action to take. Can be one of %(choices)s, defaults to %(default)s. 'print' prints the configuration as it was rendered by Mako, 'push' compares the generated configuration against the NetCup authoritative settings (and possibly sets them when --commit is given), 'pull' creates a configuration file from the current server settings (the domain names to pull are specified instead of a configuration filename).")
-	parser.add_argument("-c", "--credentials", metavar = "filename", default = "~/.config/dnssync_nc/credentials.json", help = "Specifies credential file to use. Defaults to %(default)s.")
+	parser.add_argument("-a", "--action", choices = [ "print", "push", "pull", "plan", "apply", "watch", "ddns", "import", "lint" ], default = "print", help = "Defines the action to take. Can be one of %(choices)s, defaults to %(default)s. 'print' prints the configuration as it was rendered by Mako, 'push' compares the generated configuration against the NetCup authoritative settings (and possibly sets them when --commit is given), 'pull' creates a configuration file from the current server settings (the domain names to pull are specified instead of a configuration filename). 'plan' works like 'push' without --commit, but additionally writes the changes to a plan file, which 'apply' then commits without retrieving all zones again (no layout file is given for 'apply'). 'watch' first works like 'push', but then keeps running and, whenever a layout file or a file it includes changes, renders the affected layouts again and pushes the zones whose content changed. 'ddns' sets A or AAAA records without any layout file; they are given as domainname,hostname,type,address (e.g., 'my-domain.de,home,A,1.2.3.4') and only the affected zones are retrieved and updated. 'import' converts BIND zone files (given instead of layout files) to the layout format without contacting netcup. 'lint' checks layouts for errors (e.g., a CNAME that coexists with other records, duplicate records, MX or CNAME targets that do not exist in the zone or overlong TXT records) without contacting netcup; this check is also run before 'push', 'plan' and 'watch' push anything.")
+	parser.add_argument("-p", "--plan-file", metavar = "filename", help = "Plan file that is written by the 'plan' action and read by the 'apply' action.")
+	parser.add_argument("--template-cache", metavar = "path", default = "~/.cache/dnssync_nc/templates", help = "Directory in which compiled Mako templates are kept so they do not need to be recompiled on every run. Defaults to %(default)s.")
+	parser.add_argument("--no-template-cache", action = "store_true", help = "Always compile Mako templates and do not keep them in the template cache.")
+	parser.add_argument("-c", "--credentials", metavar = "filename", action = "append", help = "Specifies credential file to use. Can be given multiple times and a credentials file can define multiple accounts; when more than one account is used, every account needs to list its layout files (or domain names for 'pull') in the credentials file and all accounts are synchronized in parallel. Defaults to ~/.config/dnssync_nc/credentials.json.")
+	parser.add_argument("--account-jobs", metavar = "count", type = int, default = 4, help = "Number of accounts that are synchronized in parallel worker processes when multiple accounts are used. Defaults to %(default)d.")
+	parser.add_argument("--render-jobs", metavar = "count", type = int, default = 4, help = "Number of layout files that are rendered and parsed in parallel worker processes when multiple layout files are given. Defaults to %(default)d.")
 	parser.add_argument("-I", "--include-dir", metavar = "path", action = "append", default = [ ], help = "When rendering Mako templates, include this as a include directory as well. Can be specified multiple times.")
 	parser.add_argument("-C", "--commit", action = "store_true", help = "Actually update entries instead of the default, which is to perform a dry-run.")
+	parser.add_argument("--watch-poll", action = "store_true", help = "For the 'watch' action, detect changed files by polling instead of using inotify. Polling is also used if inotify is unavailable.")
+	parser.add_argument("--watch-interval", metavar = "secs", type = float, default = 1, help = "Interval in which files are checked for changes when polling. Defaults to %(default).0f second.")
+	parser.add_argument("--no-lint", action = "store_true", help = "Do not check layouts for errors before pushing them.")
+	parser.add_argument("-i", "--incremental", action = "store_true", help = "When pushing, skip all zones which are unchanged since they were last committed successfully and whose serial on the server did not change since then. Only the zone information is retrieved for those zones, but not their records.")
+	parser.add_argument("--full", dest = "incremental", action = "store_false", help = "Always retrieve and compare all zones when pushing. This is the default and overrides a previous --incremental.")
+	parser.add_argument("--journal-file", metavar = "filename", default = "~/.cache/dnssync_nc/push_journal.sqlite3", help = "Journal in which the state of successfully committed zones is recorded for --incremental. Defaults to %(default)s.")
+	parser.add_argument("-f", "--output-format", choices = [ "layout", "bind" ], default = "layout", help = "Format in which the 'print', 'pull' and 'import' actions write zones. Can be one of %(choices)s. 'bind' writes BIND zone files with an SOA record synthesized from the zone settings. Defaults to %(default)s.")
+	parser.add_argument("-o", "--output-dir", metavar = "path", help = "For the 'pull' action, write every zone to its own file in this directory (named after the domain) instead of writing all zones to stdout.")
+	parser.add_argument("--origin", metavar = "domainname", help = "For the 'import' action, the origin of relative names in zone files that neither have an SOA record nor an $ORIGIN directive.")
+	parser.add_argument("--ignore-unsupported", action = "store_true", help = "For the 'import' action, skip records of types that netcup does not support (e.g., SRV or PTR) instead of failing.")
+	parser.add_argument("--resume", action = "store_true", help = "Resume a push that was interrupted (e.g., by a crash, a network failure or Ctrl-C). Zones which the previous push already completed are skipped as long as their serial did not change since then; only their zone information is retrieved. Requires --commit.")
+	parser.add_argument("--checkpoint-file", metavar = "filename", default = "~/.cache/dnssync_nc/push_checkpoint_{customer}.jsonl", help = "File in which every zone is recorded as soon as it has been pushed with --commit, so that an interrupted push can be continued with --resume. It is removed when the push completes. '{customer}' is replaced by the customer number of the account. Defaults to %(default)s.")
 	parser.add_argument("-s", "--sort-records", action = "store_true", help = "Print DNS records in sorted order.")
-	parser.add_argument("-d", "--domain-name", metavar = "domainname", action = "append", default = [ ], help = "Only affect these domain(s) when pushing data. Can be given multiple times. By default, all domains are affected.")
+	parser.add_argument("-d", "--domain-name", metavar = "domainname", action = "append", default = [ ], help = "Only affect these domain(s) when pushing data. Can be given multiple times. Only these domains are parsed from the rendered layouts and templates can check 'domain_filter' to skip generating all others. By default, all domains are affected.")
+	parser.add_argument("-j", "--jobs", metavar = "count", type = int, default = 4, help = "Number of API requests that are run in parallel when pulling or pushing data. Defaults to %(default)d.")
+	parser.add_argument("--commit-jobs", metavar = "count", type = int, default = 2, help = "Number of domains whose changes are committed in parallel when pushing data. Defaults to %(default)d.")
+	parser.add_argument("--chunk-size", metavar = "count", type = int, help = "Split DNS record updates of a zone into requests of at most this many records. All changes of one hostname are always sent in the same request. By default, all changes of a zone are sent in a single request.")
+	parser.add_argument("--chunk-jobs", metavar = "count", type = int, default = 1, help = "Number of record update chunks of the same zone that are sent in parallel. Defaults to %(default)d, i.e., chunks are sent in order and the first failure stops the update.")
+	parser.add_argument("--rate-limit", metavar = "requests_per_sec", type = float, help = "Do not send more than this many API requests per second. Unlimited by default.")
+	parser.add_argument("--timeout", metavar = "secs", type = float, default = 60, help = "Timeout for a single API request. Defaults to %(default).0f seconds.")
+	parser.add_argument("--retries", metavar = "count", type = int, default = 5, help = "Number of times a failed API request is retried (with exponential backoff) when the failure is transient. Defaults to %(default)d.")
+	parser.add_argument("--retry-api-status-code", metavar = "code", type = int, action = "append", default = [ ], help = "Also retry API requests (with exponential backoff) if the netcup API answers with this status code, e.g., for temporary errors or API-level throttling. Can be given multiple times. Note that an invalid session (4001) is always handled by logging in again. By default, only HTTP status codes are retried.")
+	parser.add_argument("--json-backend", choices = [ "auto", "orjson", "json" ], default = "auto", help = "JSON implementation used to encode API requests and decode responses. Can be one of %(choices)s. 'auto' uses orjson if it is installed and the Python standard library otherwise. Defaults to %(default)s.")
+	parser.add_argument("--compress-requests", action = "store_true", help = "Send large API requests gzip-compressed. Falls back to uncompressed requests if the endpoint does not support it. Compressed responses are always accepted.")
+	parser.add_argument("--cache-file", metavar = "filename", default = "~/.cache/dnssync_nc/zone_cache.sqlite3", help = "Cache in which retrieved DNS records are kept together with the serial of their zone, so that records only need to be retrieved again when the serial changes. Defaults to %(default)s.")
+	parser.add_argument("--no-cache", action = "store_true", help = "Do not use the DNS record cache at all.")
+	parser.add_argument("--refresh-cache", action = "store_true", help = "Ignore any cached DNS records and always retrieve them from the server, but update the cache with the results.")
+	parser.add_argument("-P", "--persist-session", action = "store_true", help = "Do not log out after running, but keep the API session and reuse it on the next invocation until the server rejects it. Saves a login and logout round-trip per invocation.")
+	parser.add_argument("--session-file", metavar = "filename", default = "~/.cache/dnssync_nc/sessions.json", help = "File in which API sessions are kept when --persist-session is used. Defaults to %(default)s.")
+	parser.add_argument("--timings", action = "store_true", help = "Measure the time spent in each phase (rendering, parsing, login, fetching, diffing, committing) as well as latency and payload sizes of every API action and print them when done.")
+	parser.add_argument("--timings-json", metavar = "filename", help = "Write the measured timings as JSON to this file. Implies that timings are measured.")
+	parser.add_argument("--timings-prometheus", metavar = "filename", help = "Write the measured timings in the Prometheus text exposition format to this file, e.g., for the node exporter textfile collector. Implies that timings are measured.")
 	parser.add_argument("-v", "--verbose", action = "count", default = 0, help = "Increases verbosity. Can be specified multiple times to increase.")
-	parser.add_argument("domain_data", metavar = "layout_file/domainname", nargs = "+", help = "DNS layout file(s) when printing or pushing data or domainname(s) when pulling data.")
-	args = parser.parse_args(sys.argv[1:])
+	parser.add_argument("domain_data", metavar = "layout_file/domainname", nargs = "*", help = "DNS layout file(s) when printing or pushing data or domainname(s) when pulling data.")
+	args = parser.parse_args(sys.argv[1:] if (argv is None) else argv)
+
+	if (args.action in [ "plan", "apply" ]) and (args.plan_file is None):
+		print(f"The '{args.action}' action requires a plan file to be given with --plan-file.")
+		return 1
+
+	if (args.action == "apply") and (len(args.domain_data) != 0):
+		print("The 'apply' action takes the changes from the plan file, no layout files may be given.")
+		return 1
+
+	if (args.action in [ "print", "lint" ]) and (len(args.domain_data) == 0):
+		print(f"The '{args.action}' action requires at least one layout file.")
+		return 1
+
+	if (args.action == "import") and (len(args.domain_data) == 0):
+		print("The 'import' action requires at least one BIND zone file.")
+		return 1
 
-	if (args.commit) and (args.action != "push"):
-		print(f"Incompatible arguments: commiting entries only makes sense when the 'push' action is used, but you are using the '{args.action}' action.")
+	if (args.commit) and (args.action not in [ "push", "watch", "ddns" ]):
+		print(f"Incompatible arguments: commiting entries only makes sense when the 'push', 'watch' or 'ddns' action is used, but you are using the '{args.action}' action.")
 		return 1
 
-	cli = NetcupCLI(args)
-	return cli.run()
+	if args.resume and ((args.action != "push") or (not args.commit)):
+		print("Resuming only makes sense when committing with the 'push' action.")
+		return 1
+
+	if (args.output_dir is not None) and (args.action != "pull"):
+		print(f"An output directory can only be used with the 'pull' action, but you are using the '{args.action}' action.")
+		return 1
+
+	if args.action == "ddns":
+		for update in args.domain_data:
+			fields = update.split(",")
+			if (len(fields) != 4) or (fields[2] not in [ "A", "AAAA" ]):
+				print(f"Dynamic DNS updates need to be given as domainname,hostname,type,address with a type of A or AAAA, but got: {update}")
+				return 1
+			try:
+				dnssync_nc.DNSRecord.deserialize({ "type": fields[2], "hostname": fields[1], "destination": fields[3] })
+			except ValueError as e:
+				print(f"Invalid dynamic DNS update {update}: {str(e)}")
+				return 1
+
+	if (args.jobs < 1) or (args.commit_jobs < 1) or (args.chunk_jobs < 1) or (args.account_jobs < 1) or (args.render_jobs < 1):
+		print(f"Number of parallel jobs must be at least 1, but {args.jobs} jobs, {args.commit_jobs} commit jobs, {args.chunk_jobs} chunk jobs, {args.account_jobs} account jobs and {args.render_jobs} render jobs were given.")
+		return 1
+
+	if args.json_backend not in [ "auto" ] + dnssync_nc.JSONCodec.available_backends():
+		print(f"JSON backend '{args.json_backend}' is not available, install it or choose one of: {', '.join(dnssync_nc.JSONCodec.available_backends())}")
+		return 1
+
+	if (args.chunk_size is not None) and (args.chunk_size < 1):
+		print(f"Chunk size must be at least 1, but {args.chunk_size} was given.")
+		return 1
+
+	if args.action in [ "print", "import", "lint" ]:
+		cli = NetcupCLI(args)
+		return cli.run()
+
+	accounts = [ account for credentials_filename in (args.credentials or [ "~/.config/dnssync_nc/credentials.json" ]) for account in dnssync_nc.NetcupAccount.read_credentials_file(os.path.expanduser(credentials_filename)) ]
+	if len(accounts) > 1:
+		if args.action in [ "plan", "apply", "watch", "ddns" ]:
+			print(f"The '{args.action}' action can only be used with a single account, but {len(accounts)} accounts are defined.")
+			return 1
+		if len(args.domain_data) != 0:
+			print("When multiple accounts are used, the layout files and domain names of each account need to be given in the credentials file(s), not on the command line.")
+			return 1
+
+	account_jobs = [ ]
+	for account in accounts:
+		if len(args.domain_data) != 0:
+			domain_data = args.domain_data
+		else:
+			domain_data = { "pull": account.domains, "ddns": [ ] }.get(args.action, account.layouts)
+		if (len(domain_data) == 0) and (args.action != "apply"):
+			print(f"The '{args.action}' action requires at least one layout file or domain name, but none was given for {account.display_name}.")
+			return 1
+		account_jobs.append((account, domain_data))
+
+	if len(account_jobs) == 1:
+		(account, domain_data) = account_jobs[0]
+		args.domain_data = domain_data
+		cli = NetcupCLI(args, account)
+		return cli.run()
+	else:
+		return MultiAccountSync(args, account_jobs).run()
 
 if __name__ == "__main__":
 	sys.exit(main())